@@ -1,9 +1,11 @@
+import re
 import time
+import queue
 import threading
 import platform
 import logging
-import gc
 from collections import deque
+from math import hypot
 from typing import Dict, Any, Optional, Callable, Set
 from datetime import datetime, timedelta
 
@@ -22,6 +24,16 @@ from config import config
 
 logger = logging.getLogger(__name__)
 
+NS_PER_SECOND = 1_000_000_000
+
+# Key names that must never be stored verbatim
+_REDACT_TOKENS = frozenset({"password", "passwd", "pwd", "secret", "key"})
+_REDACT_RE = re.compile("|".join(sorted(_REDACT_TOKENS)), re.IGNORECASE)
+_MIN_REDACT_TOKEN_LEN = min(len(token) for token in _REDACT_TOKENS)
+
+# Queue marker telling the database writer to flush and exit
+_DB_WRITER_STOP = object()
+
 
 class ActivityType:
     KEYBOARD = "keyboard"
@@ -30,7 +42,18 @@ class ActivityType:
     SYSTEM = "system"
 
 
+# Clock alias for the per-event input handlers
+_monotonic_ns = time.monotonic_ns
+
+# Shared details for fixed-shape events; consumers must treat them as read-only
+_IDLE_DETAILS = {True: {"idle_state": True}, False: {"idle_state": False}}
+_INTENSITY_UPDATE_DETAILS = {"type": "intensity_update"}
+_MAX_KEY_DETAILS_CACHE = 512
+
+
 class ActivityEvent:
+    __slots__ = ("timestamp", "activity_type", "intensity", "details")
+
     def __init__(
         self,
         timestamp: float,
@@ -69,15 +92,36 @@ class ActivityMonitor:
         self.is_monitoring = False
         self.is_paused = False
         self.current_session_id = None
-        self.last_activity_time = time.time()
+        # Activity timing runs on the monotonic clock in integer nanoseconds;
+        # wall-clock timestamps are derived from it via _epoch_offset_ns.
+        self._epoch_offset_ns = time.time_ns() - time.monotonic_ns()
+        self.last_activity_time_ns = time.monotonic_ns()
         self.idle_state = False
         self.idle_start_time = None
 
         # Activity tracking
+        # Producers append to their own thread-local deque without locking;
+        # the scheduler thread merges them into activity_history.
         self.activity_history = deque(maxlen=1000)
-        self.keypress_times = deque(maxlen=10)
-        self.mouse_positions = deque(maxlen=5)
-        self.last_intensity_calculation = time.time()
+        self._tls = threading.local()
+        self._tls_deques = []
+        self._tls_register_lock = threading.Lock()
+        # Time-ordered; the intensity windows trim expired entries from the left.
+        # Listener and scheduler threads both trim, so trims hold _window_lock
+        # (appends stay lock-free: they only touch the right end)
+        self._window_lock = threading.Lock()
+        self.keypress_times = deque(maxlen=256)
+        self._key_details_cache = {}  # str(key) -> shared {"key": sanitized}
+        self.mouse_positions = deque(maxlen=256)
+
+        # Mouse-move coalescing: moves closer than both limits to the last
+        # recorded one only refresh last_activity_time_ns
+        self.mouse_throttle_ns = 20_000_000  # 20ms
+        self.mouse_throttle_px = 8
+        self._last_mouse_emit_ns = 0
+        self._last_mouse_xy = (0, 0)
+        self.intensity_cache_ttl_ns = 200_000_000  # 200ms
+        self._intensity_cache = (0, 0.0)  # (monotonic_ns, intensity)
 
         # Time tracking
         self.total_active_time = 0
@@ -88,8 +132,10 @@ class ActivityMonitor:
 
         # Threading
         self.shutdown_event = threading.Event()
-        self.monitor_thread = None
-        self.intensity_thread = None
+        self._wakeup = threading.Condition()
+        self._wakeup_pending = False
+        self.scheduler_thread = None
+        self.db_writer_thread = None
         self.activity_lock = threading.Lock()
 
         # pynput listeners
@@ -100,14 +146,24 @@ class ActivityMonitor:
         self.platform = platform.system()
         self.permissions_ok = True
 
-        # Callbacks
+        # Callbacks (activity callbacks receive lists of events, delivered in
+        # batches from the scheduler thread rather than on the input path)
         self.activity_callbacks = []
+        self._callback_events = deque(maxlen=1000)
+        self.callback_flush_interval_ns = 200_000_000  # 200ms
         self.idle_callbacks = []
         self.error_callbacks = []
 
         # Performance
-        self.last_cleanup = time.time()
         self.cleanup_interval = 60  # seconds
+        self._next_cleanup_ns = (
+            time.monotonic_ns() + self.cleanup_interval * NS_PER_SECOND
+        )
+
+        # Batched database writes (drained by the writer thread)
+        self._db_queue = queue.SimpleQueue()
+        self.db_batch_size = 128
+        self.db_flush_interval = 1.0  # seconds
 
         # Check permissions
         self._check_permissions()
@@ -127,7 +183,7 @@ class ActivityMonitor:
                 logger.info("macOS accessibility permissions: OK")
                 return True
             except Exception as e:
-                logger.error(f"macOS accessibility permissions error: {e}")
+                logger.error("macOS accessibility permissions error: %s", e)
                 self.permissions_ok = False
                 return False
 
@@ -135,10 +191,10 @@ class ActivityMonitor:
             try:
                 # Windows and Linux typically work without special permissions
                 controller = keyboard.Controller()
-                logger.info(f"{self.platform} input monitoring: OK")
+                logger.info("%s input monitoring: OK", self.platform)
                 return True
             except Exception as e:
-                logger.error(f"{self.platform} input monitoring error: {e}")
+                logger.error("%s input monitoring error: %s", self.platform, e)
                 self.permissions_ok = False
                 return False
 
@@ -157,18 +213,21 @@ class ActivityMonitor:
 
             try:
                 self.current_session_id = session_id
-                self.last_activity_time = time.time()
+                self._epoch_offset_ns = time.time_ns() - time.monotonic_ns()
+                self.last_activity_time_ns = time.monotonic_ns()
                 self.idle_state = False
                 self.is_monitoring = True
                 self.is_paused = False
 
                 # Clear buffers
-                self.activity_history.clear()
-                self.keypress_times.clear()
-                self.mouse_positions.clear()
+                self._reset_activity_history()
+                self._intensity_cache = (0, 0.0)
+                self.keypress_times = deque(maxlen=256)
+                self.mouse_positions = deque(maxlen=256)
 
                 # Reset shutdown event
                 self.shutdown_event.clear()
+                self._wakeup_pending = False
 
                 # Start input listeners (with fallback if they fail)
                 listeners_started = self._start_input_listeners()
@@ -181,26 +240,30 @@ class ActivityMonitor:
                     self.fallback_mode = False
 
                 # Start background threads (always works even without listeners)
-                self.monitor_thread = threading.Thread(
-                    target=self._idle_detection_loop,
+                self.scheduler_thread = threading.Thread(
+                    target=self._scheduler_loop,
                     daemon=True,
-                    name="ActivityMonitor-IdleDetection",
+                    name="ActivityMonitor-Scheduler",
                 )
-                self.monitor_thread.start()
+                self.scheduler_thread.start()
 
-                self.intensity_thread = threading.Thread(
-                    target=self._intensity_calculation_loop,
+                self.db_writer_thread = threading.Thread(
+                    target=self._db_writer_loop,
                     daemon=True,
-                    name="ActivityMonitor-Intensity",
+                    name="ActivityMonitor-DBWriter",
                 )
-                self.intensity_thread.start()
+                self.db_writer_thread.start()
 
                 if self.fallback_mode:
                     logger.info(
-                        f"Started timer-based monitoring for session {session_id} (no system activity tracking)"
+                        "Started timer-based monitoring for session %s "
+                        "(no system activity tracking)",
+                        session_id,
                     )
                 else:
-                    logger.info(f"Started activity monitoring for session {session_id}")
+                    logger.info(
+                        "Started activity monitoring for session %s", session_id
+                    )
 
                 # Log start event
                 self._log_activity_event(
@@ -210,7 +273,7 @@ class ActivityMonitor:
                 return True
 
             except Exception as e:
-                logger.error(f"Failed to start monitoring: {e}")
+                logger.error("Failed to start monitoring: %s", e)
                 self._cleanup()
                 return False
 
@@ -223,6 +286,7 @@ class ActivityMonitor:
             try:
                 self.is_monitoring = False
                 self.shutdown_event.set()
+                self._wake_scheduler()
 
                 # Stop input listeners
                 self._stop_input_listeners()
@@ -246,7 +310,7 @@ class ActivityMonitor:
                 return True
 
             except Exception as e:
-                logger.error(f"Error stopping monitoring: {e}")
+                logger.error("Error stopping monitoring: %s", e)
                 return False
 
     def pause_monitoring(self) -> bool:
@@ -272,7 +336,8 @@ class ActivityMonitor:
 
         with self.activity_lock:
             self.is_paused = False
-            self.last_activity_time = time.time()
+            self.last_activity_time_ns = time.monotonic_ns()
+            self._wake_scheduler()
 
             # Log resume event
             self._log_activity_event(
@@ -284,11 +349,17 @@ class ActivityMonitor:
 
     def is_idle(self) -> bool:
         """Check if user is currently idle"""
-        time_since_activity = time.time() - self.last_activity_time
-        return time_since_activity >= self.idle_threshold
+        time_since_activity_ns = time.monotonic_ns() - self.last_activity_time_ns
+        return time_since_activity_ns >= self.idle_threshold * NS_PER_SECOND
 
-    def get_current_stats(self) -> Dict[str, Any]:
-        """Get current activity statistics"""
+    def get_current_stats(
+        self, session_status: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Get current activity statistics
+
+        Pass session_status when the caller already holds a fresh
+        SessionManager.get_current_status() result, to avoid fetching it twice.
+        """
         with self.activity_lock:
             if not self.is_monitoring or not self.current_session_id:
                 return {
@@ -300,7 +371,7 @@ class ActivityMonitor:
                     "intensity": 0.0,
                 }
 
-            stats = self._calculate_current_stats()
+            stats = self._calculate_current_stats(session_status)
 
             # Safety check: ensure no negative values
             stats["total_seconds"] = max(0, stats.get("total_seconds", 0))
@@ -316,30 +387,33 @@ class ActivityMonitor:
             return False
 
         try:
-            # Wrap callbacks in try-except to handle macOS threading issues
+            # Bind handlers once so the per-event callbacks below resolve them
+            # as closure variables instead of attribute lookups on self
+            on_keyboard_activity = self._on_keyboard_activity
+            on_mouse_activity = self._on_mouse_activity
+            throttle_mouse_move = self._throttle_mouse_move
+
+            # The keyboard/mouse handlers catch their own errors (macOS threading
+            # issues); only the throttle step needs a guard of its own
             def on_key_press(key):
-                try:
-                    if not self.is_monitoring or self.is_paused:
-                        return
-                    self._on_keyboard_activity(key)
-                except Exception as e:
-                    logger.debug(f"Keyboard callback error: {e}")
+                if not self.is_monitoring or self.is_paused:
+                    return
+                on_keyboard_activity(key)
 
             def on_mouse_move(x, y):
                 try:
                     if not self.is_monitoring or self.is_paused:
                         return
-                    self._on_mouse_activity(x, y, 0, 0)
+                    if throttle_mouse_move(x, y):
+                        return
+                    on_mouse_activity(x, y, 0, 0)
                 except Exception as e:
-                    logger.debug(f"Mouse move callback error: {e}")
+                    logger.debug("Mouse move callback error: %s", e)
 
             def on_mouse_click(x, y, button, pressed):
-                try:
-                    if not self.is_monitoring or self.is_paused:
-                        return
-                    self._on_mouse_activity(x, y, 1, 1)
-                except Exception as e:
-                    logger.debug(f"Mouse click callback error: {e}")
+                if not self.is_monitoring or self.is_paused:
+                    return
+                on_mouse_activity(x, y, 1, 1)
 
             # Start keyboard listener with macOS compatibility workaround
             try:
@@ -350,7 +424,7 @@ class ActivityMonitor:
                 self.keyboard_listener.start()
                 logger.info("Keyboard listener started")
             except Exception as e:
-                logger.error(f"Failed to start keyboard listener: {e}")
+                logger.error("Failed to start keyboard listener: %s", e)
                 logger.warning("Continuing without keyboard monitoring")
                 # Don't return False - allow fallback to mouse-only monitoring
 
@@ -365,7 +439,7 @@ class ActivityMonitor:
                 self.mouse_listener.start()
                 logger.info("Mouse listener started")
             except Exception as e:
-                logger.error(f"Failed to start mouse listener: {e}")
+                logger.error("Failed to start mouse listener: %s", e)
                 logger.warning("Continuing without mouse monitoring")
 
             # Check if at least one listener started successfully
@@ -379,7 +453,7 @@ class ActivityMonitor:
             return True
 
         except Exception as e:
-            logger.error(f"Failed to start input listeners: {e}")
+            logger.error("Failed to start input listeners: %s", e)
             return False
 
     def _stop_input_listeners(self):
@@ -391,45 +465,77 @@ class ActivityMonitor:
                 self.mouse_listener.stop()
             logger.info("Stopped input listeners")
         except Exception as e:
-            logger.error(f"Error stopping input listeners: {e}")
+            logger.error("Error stopping input listeners: %s", e)
 
     def _on_keyboard_activity(self, key):
         """Handle keyboard activity with error handling"""
         try:
-            current_time = time.time()
-            self.last_activity_time = current_time
+            now_ns = _monotonic_ns()
+            self.last_activity_time_ns = now_ns
+            if self.idle_state:
+                self._wake_scheduler()
 
             # Record keypress for intensity calculation
-            self.keypress_times.append(current_time)
+            self.keypress_times.append(now_ns)
 
             # Create activity event
             event = ActivityEvent(
-                timestamp=current_time,
+                timestamp=self._wall_time(now_ns),
                 activity_type=ActivityType.KEYBOARD,
-                intensity=self._calculate_keyboard_intensity(),
-                details={"key": self._sanitize_key(str(key))},
+                intensity=self._calculate_keyboard_intensity(now_ns),
+                details=self._key_details(key),
             )
 
             self._record_activity_event(event)
         except Exception as e:
-            logger.debug(f"Keyboard activity error: {e}")
+            logger.debug("Keyboard activity error: %s", e)
+
+    def _throttle_mouse_move(self, x, y) -> bool:
+        """Return True if a mouse move should be coalesced into the previous one"""
+        now_ns = _monotonic_ns()
+        self.last_activity_time_ns = now_ns
+        if self.idle_state:
+            self._wake_scheduler()
+
+        last_x, last_y = self._last_mouse_xy
+        if (
+            now_ns - self._last_mouse_emit_ns < self.mouse_throttle_ns
+            and abs(x - last_x) + abs(y - last_y) < self.mouse_throttle_px
+        ):
+            return True
+
+        self._last_mouse_emit_ns = now_ns
+        self._last_mouse_xy = (x, y)
+        return False
 
     def _on_mouse_activity(self, x, y, dx, dy):
         """Handle mouse activity with error handling"""
         try:
-            current_time = time.time()
-            self.last_activity_time = current_time
-
-            # Track mouse position for movement patterns
-            self.mouse_positions.append((x, y, current_time))
+            now_ns = _monotonic_ns()
+            self.last_activity_time_ns = now_ns
+            if self.idle_state:
+                self._wake_scheduler()
+
+            # Track mouse position for movement patterns, along with the running
+            # path length so intensity can be read off without re-walking it
+            mouse_positions = self.mouse_positions
+            try:
+                last_x, last_y, _, path_length = mouse_positions[-1]
+                path_length += hypot(x - last_x, y - last_y)
+            except IndexError:
+                path_length = 0.0
+            mouse_positions.append((x, y, now_ns, path_length))
 
             # Calculate movement intensity
-            distance = (dx**2 + dy**2) ** 0.5
-            intensity = min(distance / 100.0, 1.0)  # Normalize to 0-1
+            # Normalize to 0-1; 100px or more saturates, so skip the sqrt
+            if dx * dx + dy * dy >= 10000:
+                intensity = 1.0
+            else:
+                intensity = hypot(dx, dy) / 100.0
 
             # Create activity event
             event = ActivityEvent(
-                timestamp=current_time,
+                timestamp=self._wall_time(now_ns),
                 activity_type=ActivityType.MOUSE,
                 intensity=intensity,
                 details={"position": (x, y), "movement": (dx, dy)},
@@ -437,190 +543,338 @@ class ActivityMonitor:
 
             self._record_activity_event(event)
         except Exception as e:
-            logger.debug(f"Mouse activity error: {e}")
+            logger.debug("Mouse activity error: %s", e)
 
     def _record_activity_event(self, event: ActivityEvent):
-        """Record an activity event"""
-        with self.activity_lock:
-            self.activity_history.append(event)
+        """Record an activity event (lock-free, called from listener threads)"""
+        self._local_history().append(event)
 
-            # Update session manager
-            if self.session_manager:
-                self.session_manager.update_session_activity(event.to_dict())
+        # Update session manager (the event row itself is written by the
+        # batched database writer below)
+        if self.session_manager:
+            self.session_manager.touch_last_activity(event.timestamp)
 
-            # Update database if we have a session
-            if self.current_session_id and self.db_manager:
-                self.db_manager.log_activity_event(
+        # Queue for the database writer if we have a session
+        if self.current_session_id and self.db_manager:
+            self._db_queue.put(
+                (
                     self.current_session_id,
                     event.activity_type,
+                    event.timestamp,
                     event.intensity,
                     event.details,
                 )
+            )
 
-            # Trigger callbacks
-            for callback in self.activity_callbacks:
-                try:
-                    callback(event)
-                except Exception as e:
-                    logger.error(f"Error in activity callback: {e}")
+        # Hand off to the scheduler thread for batched callback delivery
+        if self.activity_callbacks:
+            self._callback_events.append(event)
+
+    def _local_history(self) -> deque:
+        """Get the calling thread's activity deque, registering it on first use"""
+        tls = self._tls
+        try:
+            return tls.history
+        except AttributeError:
+            history = deque(maxlen=512)
+            with self._tls_register_lock:
+                self._tls_deques.append(history)
+            tls.history = history
+            return history
+
+    def _merge_activity_history(self):
+        """Move events from the per-thread deques into activity_history"""
+        with self._tls_register_lock:
+            local_deques = list(self._tls_deques)
+
+        # Only this thread pops, so each deque holds at least len() items
+        for local_history in local_deques:
+            for _ in range(len(local_history)):
+                self.activity_history.append(local_history.popleft())
+
+    def _reset_activity_history(self):
+        """Drop all recorded events, including per-thread deques"""
+        with self._tls_register_lock:
+            self._tls = threading.local()
+            self._tls_deques = []
+        self.activity_history = deque(maxlen=1000)
+
+    def _scheduler_loop(self):
+        """Background thread driving idle detection and intensity updates"""
+        now_ns = time.monotonic_ns()
+        next_idle_check_ns = now_ns
+        next_intensity_tick_ns = now_ns
+        next_callback_flush_ns = now_ns
 
-    def _idle_detection_loop(self):
-        """Background thread for idle detection"""
         while not self.shutdown_event.is_set():
             try:
-                if self.is_monitoring and not self.is_paused:
-                    current_time = time.time()
-                    time_since_last_activity = current_time - self.last_activity_time
-
-                    was_idle = self.idle_state
-                    currently_idle = time_since_last_activity >= self.idle_threshold
-
-                    # Handle idle state changes
-                    if was_idle != currently_idle:
-                        self.idle_state = currently_idle
-
-                        event = ActivityEvent(
-                            timestamp=current_time,
-                            activity_type=ActivityType.IDLE,
-                            intensity=0.0 if currently_idle else 0.1,
-                            details={"idle_state": currently_idle},
-                        )
-
-                        self._record_activity_event(event)
-
-                        # Update session manager
-                        if self.session_manager:
-                            self.session_manager.update_session_idle_state(
-                                currently_idle, current_time
-                            )
-
-                        # Trigger idle callbacks
-                        for callback in self.idle_callbacks:
-                            try:
-                                callback(currently_idle, current_time)
-                            except Exception as e:
-                                logger.error(f"Error in idle callback: {e}")
-
-                # Sleep for check interval
-                self.shutdown_event.wait(self.check_interval_ms / 1000.0)
+                now_ns = time.monotonic_ns()
+
+                quiet = self.is_paused or not self.is_monitoring
+
+                if now_ns >= next_idle_check_ns:
+                    if quiet:
+                        # resume_monitoring() wakes the scheduler
+                        next_idle_check_ns = self._next_cleanup_ns
+                    else:
+                        next_idle_check_ns = self._idle_detection_tick(now_ns)
+
+                if now_ns >= next_intensity_tick_ns:
+                    intensity = self._intensity_calculation_tick(now_ns)
+
+                    if intensity is None or quiet or self.idle_state:
+                        # Nothing to publish or no input to measure, so only
+                        # the periodic cleanup is due; input after idling,
+                        # resume and new subscribers wake the scheduler
+                        next_intensity_tick_ns = self._next_cleanup_ns
+                    elif intensity > 0.5:
+                        # Adaptive interval based on activity level
+                        next_intensity_tick_ns = now_ns + NS_PER_SECOND // 2
+                    else:
+                        next_intensity_tick_ns = now_ns + NS_PER_SECOND
+
+                if now_ns >= next_callback_flush_ns:
+                    next_callback_flush_ns = now_ns + self.callback_flush_interval_ns
+                    self._flush_activity_callbacks()
+
+                # Sleep until the earliest deadline; callback flushes only need
+                # their own wakeups while someone is subscribed
+                next_deadline_ns = min(next_idle_check_ns, next_intensity_tick_ns)
+                if self.activity_callbacks:
+                    next_deadline_ns = min(next_deadline_ns, next_callback_flush_ns)
+                wait_ns = next_deadline_ns - now_ns
+                with self._wakeup:
+                    if not self._wakeup_pending:
+                        self._wakeup.wait(max(wait_ns, 0) / NS_PER_SECOND)
+                    if self._wakeup_pending:
+                        # Activity while idle, resume or a new subscriber:
+                        # re-check idle state and restart intensity ticks
+                        self._wakeup_pending = False
+                        next_idle_check_ns = 0
+                        next_intensity_tick_ns = 0
 
             except Exception as e:
-                logger.error(f"Error in idle detection loop: {e}")
+                logger.error("Error in activity scheduler loop: %s", e)
 
-    def _intensity_calculation_loop(self):
-        """Background thread for intensity calculations"""
-        while not self.shutdown_event.is_set():
-            try:
-                current_time = time.time()
+    def _wake_scheduler(self):
+        """Wake the scheduler thread ahead of its next deadline"""
+        with self._wakeup:
+            self._wakeup_pending = True
+            self._wakeup.notify()
 
-                # Periodic cleanup
-                if current_time - self.last_cleanup >= self.cleanup_interval:
-                    self._perform_cleanup()
-                    self.last_cleanup = current_time
+    def _idle_detection_tick(self, now_ns: int) -> int:
+        """Detect idle state transitions and return when to check next"""
+        current_time = self._wall_time(now_ns)
+        last_activity_ns = self.last_activity_time_ns
+        idle_threshold_ns = self.idle_threshold * NS_PER_SECOND
 
-                # Calculate current intensity
-                intensity = self._calculate_overall_intensity()
+        was_idle = self.idle_state
+        currently_idle = now_ns - last_activity_ns >= idle_threshold_ns
 
-                # Trigger callbacks
-                for callback in self.activity_callbacks:
-                    try:
-                        callback(
-                            ActivityEvent(
-                                timestamp=current_time,
-                                activity_type=ActivityType.SYSTEM,
-                                intensity=intensity,
-                                details={"type": "intensity_update"},
-                            )
-                        )
-                    except Exception as e:
-                        logger.error(f"Error in intensity callback: {e}")
+        # Handle idle state changes
+        if was_idle != currently_idle:
+            self.idle_state = currently_idle
+
+            event = ActivityEvent(
+                timestamp=current_time,
+                activity_type=ActivityType.IDLE,
+                intensity=0.0 if currently_idle else 0.1,
+                details=_IDLE_DETAILS[currently_idle],
+            )
 
-                # Adaptive sleep based on activity level
-                sleep_time = 0.5 if intensity > 0.5 else 1.0
-                self.shutdown_event.wait(sleep_time)
+            self._record_activity_event(event)
 
+            # Update session manager
+            if self.session_manager:
+                self.session_manager.update_session_idle_state(
+                    currently_idle, current_time
+                )
+
+            # Trigger idle callbacks
+            for callback in self.idle_callbacks:
+                try:
+                    callback(currently_idle, current_time)
+                except Exception as e:
+                    logger.error("Error in idle callback: %s", e)
+
+        if currently_idle:
+            # Resumed activity wakes the scheduler directly; this is a fallback
+            return now_ns + idle_threshold_ns
+
+        # Cannot go idle before the threshold has elapsed since the last activity
+        return max(last_activity_ns + idle_threshold_ns, now_ns + 50_000_000)
+
+    def _intensity_calculation_tick(self, now_ns: int) -> Optional[float]:
+        """Merge recorded events, run periodic cleanup and publish intensity
+
+        Returns the published intensity, or None when nobody is subscribed.
+        """
+        current_time = self._wall_time(now_ns)
+
+        # Periodic cleanup
+        if now_ns >= self._next_cleanup_ns:
+            self._perform_cleanup(now_ns)
+            self._next_cleanup_ns = now_ns + self.cleanup_interval * NS_PER_SECOND
+
+        # Consolidate events recorded by the listener threads
+        self._merge_activity_history()
+
+        # Intensity updates only matter to callbacks; stats compute on demand
+        if not self.activity_callbacks:
+            return None
+
+        intensity = self._calculate_overall_intensity()
+        self._callback_events.append(
+            ActivityEvent(
+                timestamp=current_time,
+                activity_type=ActivityType.SYSTEM,
+                intensity=intensity,
+                details=_INTENSITY_UPDATE_DETAILS,
+            )
+        )
+
+        return intensity
+
+    def _flush_activity_callbacks(self):
+        """Deliver buffered events to activity callbacks, one call per callback"""
+        callback_events = self._callback_events
+        events = [callback_events.popleft() for _ in range(len(callback_events))]
+        if not events:
+            return
+
+        for callback in self.activity_callbacks:
+            try:
+                callback(events)
             except Exception as e:
-                logger.error(f"Error in intensity calculation loop: {e}")
+                logger.error("Error in activity callback: %s", e)
 
-    def _calculate_keyboard_intensity(self) -> float:
+    def _db_writer_loop(self):
+        """Background thread that batches queued activity events into the database"""
+        batch = []
+        batch_started = time.monotonic()
+
+        while True:
+            try:
+                item = self._db_queue.get(timeout=self.db_flush_interval)
+            except queue.Empty:
+                item = None
+
+            if item is _DB_WRITER_STOP:
+                self._flush_db_batch(batch)
+                return
+
+            if item is not None:
+                if not batch:
+                    batch_started = time.monotonic()
+                batch.append(item)
+
+            if batch and (
+                len(batch) >= self.db_batch_size
+                or time.monotonic() - batch_started >= self.db_flush_interval
+            ):
+                self._flush_db_batch(batch)
+                batch = []
+
+    def _flush_db_batch(self, batch: list):
+        """Write a batch of queued activity events to the database"""
+        if not batch:
+            return
+
+        try:
+            self.db_manager.log_activity_events_batch(batch)
+        except Exception as e:
+            logger.error("Error writing activity events batch: %s", e)
+
+    def _calculate_keyboard_intensity(self, now_ns: Optional[int] = None) -> float:
         """Calculate typing intensity"""
         if len(self.keypress_times) < 2:
             return 0.1
 
-        current_time = time.time()
-        recent_keypresses = [
-            t
-            for t in self.keypress_times
-            if current_time - t <= 5.0  # Last 5 seconds
-        ]
+        if now_ns is None:
+            now_ns = time.monotonic_ns()
+        window_start_ns = now_ns - 5 * NS_PER_SECOND  # Last 5 seconds
 
-        if not recent_keypresses:
-            return 0.1
+        # Drop keypresses older than the window
+        keypress_times = self.keypress_times
+        with self._window_lock:
+            while keypress_times and keypress_times[0] < window_start_ns:
+                keypress_times.popleft()
+            if not keypress_times:
+                return 0.1
+            recent_count = len(keypress_times)
+            time_span_ns = keypress_times[-1] - keypress_times[0]
 
         # Calculate typing speed
-        time_span = recent_keypresses[-1] - recent_keypresses[0]
-        if time_span <= 0:
+        if time_span_ns <= 0:
             return 0.1
 
-        keys_per_second = len(recent_keypresses) / time_span
+        keys_per_second = recent_count * NS_PER_SECOND / time_span_ns
 
         # Normalize to 0-1 scale (max expected: 10 keys/second)
         intensity = min(keys_per_second / 10.0, 1.0)
         return max(intensity, 0.1)
 
     def _calculate_overall_intensity(self) -> float:
-        """Calculate overall activity intensity"""
-        keyboard_intensity = self._calculate_keyboard_intensity()
-        mouse_intensity = self._calculate_mouse_intensity()
+        """Calculate overall activity intensity (memoized for a short TTL)"""
+        now_ns = time.monotonic_ns()
+        cached_at_ns, cached_intensity = self._intensity_cache
+        if now_ns - cached_at_ns < self.intensity_cache_ttl_ns:
+            return cached_intensity
+
+        keyboard_intensity = self._calculate_keyboard_intensity(now_ns)
+        mouse_intensity = self._calculate_mouse_intensity(now_ns)
 
         # Weight keyboard and mouse activity (keyboard is more indicative of work)
         overall_intensity = keyboard_intensity * 0.7 + mouse_intensity * 0.3
 
         # Apply decay based on time since last activity
-        time_since_activity = time.time() - self.last_activity_time
+        time_since_activity = (now_ns - self.last_activity_time_ns) / NS_PER_SECOND
         decay_factor = max(0, 1.0 - (time_since_activity / self.idle_threshold))
 
-        final_intensity = overall_intensity * decay_factor
-        return max(final_intensity, 0.0)
+        final_intensity = max(overall_intensity * decay_factor, 0.0)
+        self._intensity_cache = (now_ns, final_intensity)
+        return final_intensity
 
-    def _calculate_mouse_intensity(self) -> float:
+    def _calculate_mouse_intensity(self, now_ns: Optional[int] = None) -> float:
         """Calculate mouse activity intensity"""
         if len(self.mouse_positions) < 2:
             return 0.1
 
-        current_time = time.time()
-        recent_positions = [
-            (x, y, t)
-            for x, y, t in self.mouse_positions
-            if current_time - t <= 2.0  # Last 2 seconds
-        ]
-
-        if len(recent_positions) < 2:
+        if now_ns is None:
+            now_ns = time.monotonic_ns()
+        window_start_ns = now_ns - 2 * NS_PER_SECOND  # Last 2 seconds
+
+        # Drop positions older than the window
+        mouse_positions = self.mouse_positions
+        with self._window_lock:
+            while mouse_positions and mouse_positions[0][2] < window_start_ns:
+                mouse_positions.popleft()
+            if not mouse_positions:
+                return 0.1
+            _, _, first_ns, first_path = mouse_positions[0]
+            _, _, last_ns, last_path = mouse_positions[-1]
+
+        time_span_ns = last_ns - first_ns
+        if time_span_ns <= 0:
             return 0.1
 
-        # Calculate total distance moved
-        total_distance = 0
-        for i in range(1, len(recent_positions)):
-            x1, y1, t1 = recent_positions[i - 1]
-            x2, y2, t2 = recent_positions[i]
-            distance = ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5
-            total_distance += distance
+        # Distance moved within the window, from the running path lengths
+        total_distance = last_path - first_path
 
         # Calculate average velocity
-        time_span = recent_positions[-1][2] - recent_positions[0][2]
-        if time_span <= 0:
-            return 0.1
-
-        avg_velocity = total_distance / time_span
+        avg_velocity = total_distance * NS_PER_SECOND / time_span_ns
 
         # Normalize to 0-1 scale (max expected: 1000 pixels/second)
         intensity = min(avg_velocity / 1000.0, 1.0)
         return max(intensity, 0.1)
 
-    def _calculate_current_stats(self) -> Dict[str, Any]:
+    def _calculate_current_stats(
+        self, session_status: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """Calculate current activity statistics - uses session manager timing"""
         # Get timing from session manager (which has the correct session start time)
-        session_status = self.session_manager.get_current_status()
+        if session_status is None:
+            session_status = self.session_manager.get_current_status()
 
         if not session_status.get("active"):
             return {
@@ -654,49 +908,51 @@ class ActivityMonitor:
             "intensity": self._calculate_overall_intensity(),
         }
 
-    def _perform_cleanup(self):
+    def _perform_cleanup(self, now_ns: Optional[int] = None):
         """Perform periodic cleanup to optimize memory"""
-        try:
-            # Clear old activity events
-            cutoff_time = time.time() - 300  # Keep last 5 minutes
-            self.activity_history = deque(
-                (
-                    event
-                    for event in self.activity_history
-                    if event.timestamp > cutoff_time
-                ),
-                maxlen=1000,
-            )
-
-            # Clear old timing data
-            cutoff_time = time.time() - 60  # Keep last minute
-            self.keypress_times = deque(
-                (t for t in self.keypress_times if t > cutoff_time), maxlen=10
-            )
+        if now_ns is None:
+            now_ns = time.monotonic_ns()
 
-            self.mouse_positions = deque(
-                (pos for pos in self.mouse_positions if pos[2] > cutoff_time), maxlen=5
-            )
+        try:
+            # Clear old activity events (trimmed in place, oldest first)
+            cutoff_time = self._wall_time(now_ns) - 300  # Keep last 5 minutes
+            activity_history = self.activity_history
+            while activity_history and activity_history[0].timestamp <= cutoff_time:
+                activity_history.popleft()
 
-            # Force garbage collection
-            gc.collect()
+            # keypress_times and mouse_positions need no cleanup: maxlen bounds
+            # them and the intensity calculations trim stale entries on read
 
         except Exception as e:
-            logger.error(f"Error during cleanup: {e}")
+            logger.error("Error during cleanup: %s", e)
 
     def _sanitize_key(self, key_str: str) -> str:
         """Sanitize key input for privacy"""
-        # Remove sensitive information from keys
-        sensitive_patterns = ["password", "passwd", "pwd", "secret", "key"]
-        key_lower = key_str.lower()
+        # Too short to contain any sensitive pattern
+        if len(key_str) < _MIN_REDACT_TOKEN_LEN:
+            return key_str
 
-        for pattern in sensitive_patterns:
-            if pattern in key_lower:
-                return "[REDACTED]"
+        # Remove sensitive information from keys
+        if _REDACT_RE.search(key_str):
+            return "[REDACTED]"
 
         # Limit key length
         return key_str[:20]
 
+    def _key_details(self, key) -> Dict[str, Any]:
+        """Return the shared, sanitized details dict for a key"""
+        key_str = str(key)
+        details = self._key_details_cache.get(key_str)
+        if details is None:
+            details = {"key": self._sanitize_key(key_str)}
+            if len(self._key_details_cache) < _MAX_KEY_DETAILS_CACHE:
+                self._key_details_cache[key_str] = details
+        return details
+
+    def _wall_time(self, monotonic_ns: int) -> float:
+        """Convert a monotonic_ns reading to a Unix timestamp in seconds"""
+        return (monotonic_ns + self._epoch_offset_ns) / NS_PER_SECOND
+
     def _log_activity_event(
         self, event_type: str, intensity: float, details: Dict[str, Any]
     ):
@@ -707,28 +963,48 @@ class ActivityMonitor:
                     self.current_session_id, event_type, intensity, details
                 )
         except Exception as e:
-            logger.error(f"Error logging activity event: {e}")
+            logger.error("Error logging activity event: %s", e)
 
     def _wait_for_threads(self, timeout: float = 5.0):
         """Wait for background threads to finish"""
-        if self.monitor_thread and self.monitor_thread.is_alive():
-            self.monitor_thread.join(timeout=timeout)
+        if self.scheduler_thread and self.scheduler_thread.is_alive():
+            self.scheduler_thread.join(timeout=timeout)
 
-        if self.intensity_thread and self.intensity_thread.is_alive():
-            self.intensity_thread.join(timeout=timeout)
+        # Deliver anything recorded since the scheduler's last flush
+        self._flush_activity_callbacks()
+
+        # Writer goes last so it drains everything queued by the scheduler
+        if self.db_writer_thread and self.db_writer_thread.is_alive():
+            self._db_queue.put(_DB_WRITER_STOP)
+            self.db_writer_thread.join(timeout=timeout)
 
     def _cleanup(self):
         """Clean up resources"""
         self.current_session_id = None
         self.is_monitoring = False
         self.is_paused = False
-        self.activity_history.clear()
-        self.keypress_times.clear()
-        self.mouse_positions.clear()
+        self._reset_activity_history()
+        self.keypress_times = deque(maxlen=256)
+        self.mouse_positions = deque(maxlen=256)
+
+    def add_activity_callback(self, callback: Callable, batched: bool = False):
+        """Add callback for activity events
+
+        Batched callbacks are called with a list of ActivityEvent objects.
+        Otherwise the callback is called once per event, as before.
+        """
+        if not batched:
+            per_event_callback = callback
+
+            def callback(events):
+                for event in events:
+                    try:
+                        per_event_callback(event)
+                    except Exception as e:
+                        logger.error("Error in activity callback: %s", e)
 
-    def add_activity_callback(self, callback: Callable):
-        """Add callback for activity events"""
         self.activity_callbacks.append(callback)
+        self._wake_scheduler()  # intensity ticks only run while subscribed
 
     def add_idle_callback(self, callback: Callable):
         """Add callback for idle state changes"""
@@ -748,7 +1024,7 @@ class ActivityMonitor:
             "platform": self.platform,
             "current_session_id": self.current_session_id,
             "activity_history_size": len(self.activity_history),
-            "last_activity": self.last_activity_time,
+            "last_activity": self._wall_time(self.last_activity_time_ns),
         }
 
 
@@ -1,7 +1,15 @@
 import os
-import json
+import re
+import gzip
+import time
+import hashlib
+import uuid
+import zlib
 import logging
+import threading
 from datetime import datetime
+from itertools import chain
+from typing import Optional, Tuple
 from flask import (
     Flask,
     request,
@@ -10,42 +18,124 @@ from flask import (
     send_from_directory,
     render_template,
 )
+from flask.json.provider import DefaultJSONProvider
 from werkzeug.exceptions import BadRequest, NotFound, InternalServerError
 from werkzeug.datastructures import FileStorage
 
+# Import orjson with error handling (falls back to ujson, then the stdlib encoder)
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+UJSON_AVAILABLE = False
+if not ORJSON_AVAILABLE:
+    try:
+        import ujson
+
+        UJSON_AVAILABLE = True
+    except ImportError:
+        pass
+
 # Import components
-from database import DatabaseManager
+from database import db_manager
 from session_manager import SessionManager
 from activity_monitor import ActivityMonitor
 from config import config
+from utils import TTLCache, configure_logging, iso_now
 
 # Import authentication
 from auth import (
     hash_password,
-    verify_password,
+    verify_password_cached,
+    password_needs_rehash,
     generate_jwt_token,
     decode_jwt_token,
+    generate_session_token,
+    SESSION_TOKEN_TTL,
     require_auth,
+    require_session,
     optional_auth,
     get_current_user,
     get_current_user_id,
+    invalidate_cached_user,
     validate_email,
     validate_password,
     sanitize_username,
+    AuthBusyError,
 )
 
 # Import material management
-from material_manager import MaterialManager, get_material_manager, ALLOWED_EXTENSIONS
-
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, config.log_level),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+from material_manager import (
+    MaterialManager,
+    get_material_manager,
+    ALLOWED_EXTENSIONS,
+    UPLOAD_FOLDER,
 )
+
+# Configure logging (handlers run on a background thread)
+configure_logging(getattr(logging, config.log_level))
 logger = logging.getLogger(__name__)
 
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that encodes responses with orjson"""
+
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs) -> str:
+        """Serialize obj to a JSON string"""
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        # Datetimes and other non-native types keep Flask's default encoding
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        """Parse request JSON with orjson (its errors subclass ValueError)"""
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Build a JSON response straight from orjson's bytes"""
+        obj = self._prepare_response_obj(args, kwargs)
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        # OPT_APPEND_NEWLINE matches Flask's trailing newline without a str copy
+        body = orjson.dumps(
+            obj, default=self.default, option=option | orjson.OPT_APPEND_NEWLINE
+        )
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+class UjsonProvider(DefaultJSONProvider):
+    """JSON provider that encodes responses with ujson (when orjson is missing)"""
+
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs) -> str:
+        """Serialize obj to a JSON string"""
+        return ujson.dumps(
+            obj,
+            ensure_ascii=self.ensure_ascii,
+            escape_forward_slashes=False,
+            indent=2 if kwargs.get("indent") else 0,
+            default=self.default,
+        )
+
+    def loads(self, s, **kwargs):
+        """Parse request JSON with ujson (its errors subclass ValueError)"""
+        return ujson.loads(s)
+
+
 # Initialize Flask app
 app = Flask(__name__, template_folder="templates", static_folder="static")
+if ORJSON_AVAILABLE:
+    app.json = OrjsonProvider(app)
+elif UJSON_AVAILABLE:
+    app.json = UjsonProvider(app)
 
 # Configure app
 app.config.update(
@@ -56,68 +146,182 @@ app.config.update(
     }
 )
 
-# Initialize components
-db_manager = DatabaseManager()
+# Behind nginx, set X_ACCEL_REDIRECT_PREFIX to an internal location aliased to
+# the uploads folder; behind Apache (mod_xsendfile), set USE_X_SENDFILE=true.
+# Either way the proxy sends material files instead of this process.
+X_ACCEL_REDIRECT_PREFIX = os.getenv("X_ACCEL_REDIRECT_PREFIX", "")
+USE_X_SENDFILE = os.getenv("USE_X_SENDFILE", "false").lower() == "true"
+app.config["USE_X_SENDFILE"] = USE_X_SENDFILE or bool(X_ACCEL_REDIRECT_PREFIX)
+
+# Initialize components (db_manager is the process-wide instance from database)
 session_manager = SessionManager(db_manager)
 activity_monitor = ActivityMonitor(session_manager, db_manager)
 
+# Short-lived caches for read-only session queries (cleared when sessions change)
+sessions_cache = TTLCache(ttl=30, maxsize=256)
+stats_cache = TTLCache(ttl=30, maxsize=1)
+health_cache = TTLCache(ttl=1, maxsize=1)  # shared by bursts of health probes
+status_cache = TTLCache(ttl=0.25, maxsize=1)  # shared by concurrent status pollers
+
 
 # Setup CORS manually (simpler approach for now)
+CORS_STATIC_HEADERS = (
+    ("Access-Control-Allow-Methods", "GET, POST, PUT, DELETE, OPTIONS"),
+    ("Access-Control-Allow-Headers", "Content-Type, Authorization, X-Requested-With"),
+    ("Access-Control-Max-Age", "86400"),
+)
+CORS_ALLOWED_ORIGINS = frozenset(config.security.cors_origins or ())
+CORS_ALLOW_ALL = "*" in CORS_ALLOWED_ORIGINS
+
+# The dev server (app.run / run.py) starts a thread per request, so a pooled
+# per-thread connection would never be reused; wsgi.py turns reuse on for
+# gunicorn's long-lived gthread workers
+app.config.setdefault("REUSE_DB_CONNECTIONS", False)
+
+
+@app.teardown_appcontext
+def release_db_connection(exc):
+    """Close this request thread's database connection unless threads are reused"""
+    if not app.config["REUSE_DB_CONNECTIONS"]:
+        db_manager.close_thread_connection()
+
+
 @app.after_request
 def after_request(response):
-    """Add CORS headers to all responses"""
+    """Add CORS headers to cross-origin responses"""
     origin = request.headers.get("Origin")
-    allowed_origins = config.security.cors_origins
+    if origin is None:
+        # Same-origin requests (the bundled UI, curl) don't need CORS headers
+        return response
 
-    if origin in allowed_origins or "*" in allowed_origins:
-        response.headers.add("Access-Control-Allow-Origin", origin or "*")
+    if CORS_ALLOW_ALL or origin in CORS_ALLOWED_ORIGINS:
+        response.headers["Access-Control-Allow-Origin"] = origin or "*"
 
-    response.headers.add(
-        "Access-Control-Allow-Methods", "GET, POST, PUT, DELETE, OPTIONS"
-    )
-    response.headers.add(
-        "Access-Control-Allow-Headers", "Content-Type, Authorization, X-Requested-With"
-    )
-    response.headers.add("Access-Control-Max-Age", "86400")
+    response.headers.update(CORS_STATIC_HEADERS)
+    return response
+
+
+class PreflightMiddleware:
+    """Answer CORS preflight (OPTIONS) requests before Flask routes them"""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        if environ.get("REQUEST_METHOD") != "OPTIONS":
+            return self.wsgi_app(environ, start_response)
+
+        headers = [("Content-Length", "0")]
+        origin = environ.get("HTTP_ORIGIN")
+        if origin is not None:
+            if CORS_ALLOW_ALL or origin in CORS_ALLOWED_ORIGINS:
+                headers.append(("Access-Control-Allow-Origin", origin))
+            headers.extend(CORS_STATIC_HEADERS)
+
+        start_response("200 OK", headers)
+        return [b""]
+
+
+app.wsgi_app = PreflightMiddleware(app.wsgi_app)
+
+
+# Response compression for larger JSON and CSV bodies
+COMPRESS_MIMETYPES = frozenset({"application/json", "text/csv"})
+COMPRESS_MIN_SIZE = 1024
+
+
+def gzip_stream(chunks):
+    """Gzip an iterable of str/bytes chunks, yielding compressed bytes"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip framing
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+            else:
+                # Keep data moving for slow producers
+                yield compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
 
+
+@app.after_request
+def compress_response(response):
+    """Gzip buffered JSON/CSV responses when the client accepts it"""
+    if (
+        response.mimetype not in COMPRESS_MIMETYPES
+        or response.status_code < 200
+        or response.status_code >= 300
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    if "gzip" not in request.accept_encodings:
+        return response
+
+    if response.is_streamed:
+        # Compress chunk by chunk so streamed exports stay streamed
+        response.response = gzip_stream(response.response)
+        response.headers.pop("Content-Length", None)
+        response.headers["Content-Encoding"] = "gzip"
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+
+    response.set_data(gzip.compress(data, compresslevel=6))
+    response.headers["Content-Encoding"] = "gzip"
+
+    # The gzipped bytes differ from the ones the ETag was computed over
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
     return response
 
 
-@app.before_request
-def handle_options():
-    """Handle OPTIONS requests for CORS"""
-    if request.method == "OPTIONS":
-        response = Response()
-        response.headers.add(
-            "Access-Control-Allow-Origin", request.headers.get("Origin", "*")
-        )
-        response.headers.add(
-            "Access-Control-Allow-Methods", "GET, POST, PUT, DELETE, OPTIONS"
-        )
-        response.headers.add(
-            "Access-Control-Allow-Headers",
-            "Content-Type, Authorization, X-Requested-With",
-        )
-        return response, 200
+def conditional_json_response(
+    body: str, max_age: Optional[int] = None, vary: Tuple[str, ...] = ()
+) -> Response:
+    """Serve an encoded JSON body with an ETag, answering 304 when unchanged"""
+    response = app.response_class(f"{body}\n", mimetype=app.json.mimetype)
+    response.vary.update(vary)
+    response.set_etag(hashlib.blake2b(body.encode(), digest_size=8).hexdigest())
+    response.cache_control.private = True
+    if max_age is None:
+        response.cache_control.no_cache = True  # always revalidate
+    else:
+        response.cache_control.max_age = max_age
+    return response.make_conditional(request)
 
 
-def validate_json_request(required_fields: list = None) -> dict:
+def validate_json_request(required_fields: frozenset = frozenset()) -> dict:
     """Validate JSON request and return data"""
     if not request.is_json:
         raise BadRequest("Request must be JSON")
 
-    data = request.get_json()
-    if not data:
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data, dict):
         raise BadRequest("Invalid JSON data")
 
-    if required_fields:
-        missing = [field for field in required_fields if field not in data]
-        if missing:
-            raise BadRequest(f"Missing required fields: {', '.join(missing)}")
+    missing = required_fields - data.keys()
+    if missing:
+        raise BadRequest(f"Missing required fields: {', '.join(sorted(missing))}")
 
     return data
 
 
+# Characters and URL schemes rejected in topics
+DANGEROUS_TOPIC_RE = re.compile(r"""[<>"'&]|javascript:|data:""", re.IGNORECASE)
+
+
 def validate_topic(topic: str) -> str:
     """Validate and sanitize topic input"""
     if not topic or not isinstance(topic, str):
@@ -131,13 +335,54 @@ def validate_topic(topic: str) -> str:
         raise BadRequest("Topic too long (max 200 characters)")
 
     # Check for malicious content
-    dangerous_chars = ["<", ">", '"', "'", "&", "javascript:", "data:"]
-    if any(char in topic.lower() for char in dangerous_chars):
+    if DANGEROUS_TOPIC_RE.search(topic):
         raise BadRequest("Topic contains invalid characters")
 
     return topic
 
 
+def format_sessions(rows: list) -> list:
+    """Format get_session_rows() tuples for the /get_sessions response"""
+    return [
+        {
+            "id": session_id,
+            "topic": topic,
+            "description": description,
+            "date": start_time[:10] if start_time else "",
+            "start_time": start_time,
+            "end_time": end_time,
+            "active_minutes": active_seconds // 60,
+            "idle_minutes": idle_seconds // 60,
+            "total_minutes": total_seconds // 60,
+            "productivity": productivity,
+            "success": success,
+            "completion_notes": completion_notes,
+            "created_at": created_at,
+        }
+        for (
+            session_id,
+            topic,
+            description,
+            start_time,
+            end_time,
+            active_seconds,
+            idle_seconds,
+            total_seconds,
+            productivity,
+            success,
+            completion_notes,
+            created_at,
+        ) in rows
+    ]
+
+
+def wants_light_response() -> bool:
+    """Check whether the client asked to skip the response body"""
+    return (
+        request.headers.get("Light-Response") == "1" or request.args.get("light") == "1"
+    )
+
+
 def create_success_response(data: dict = None, message: str = "Success") -> dict:
     """Create standardized success response"""
     response = {"success": True, "message": message}
@@ -146,25 +391,55 @@ def create_success_response(data: dict = None, message: str = "Success") -> dict
     return response
 
 
+def invalidate_session_caches():
+    """Drop cached session listings, statistics and status after sessions change"""
+    sessions_cache.clear()
+    stats_cache.clear()
+    status_cache.clear()
+
+
+# Encoded bodies of detail-free error responses, keyed by message
+ERROR_BODY_CACHE = {}
+MAX_ERROR_BODY_CACHE = 256
+
+
 def create_error_response(
     message: str, status_code: int = 400, details: dict = None
 ) -> tuple:
     """Create standardized error response"""
-    response = {"success": False, "error": message}
     if details:
+        response = {"success": False, "error": message}
         response.update(details)
-    return jsonify(response), status_code
+        return jsonify(response), status_code
+
+    # Most errors are a handful of fixed messages; encode each one only once
+    body = ERROR_BODY_CACHE.get(message)
+    if body is None:
+        body = f"{app.json.dumps({'success': False, 'error': message})}\n"
+        if len(ERROR_BODY_CACHE) < MAX_ERROR_BODY_CACHE:
+            ERROR_BODY_CACHE[message] = body
+    return app.response_class(body, mimetype=app.json.mimetype), status_code
+
+
+# Rendered index page; its only variable (db_path) is fixed for the process
+INDEX_HTML = None
 
 
 # Main web route
 @app.route("/")
 def index():
     """Serve the main web interface"""
+    global INDEX_HTML
     try:
-        db_path = db_manager.db_path
-        return render_template("index.html", db_path=db_path)
+        html = INDEX_HTML
+        if html is None:
+            html = render_template("index.html", db_path=db_manager.db_path)
+            # Debug mode reloads edited templates, so only cache outside it
+            if not app.debug:
+                INDEX_HTML = html
+        return html
     except Exception as e:
-        logger.error(f"Error serving index page: {e}")
+        logger.error("Error serving index page: %s", e)
         return "Error loading page", 500
 
 
@@ -175,10 +450,9 @@ def index():
 def register():
     """Register a new user"""
     try:
-        if not request.is_json:
-            return create_error_response("Request must be JSON", 400)
-
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return create_error_response("Request must be a JSON object", 400)
         email = data.get("email", "").strip().lower()
         password = data.get("password", "")
         username = data.get("username", "").strip()
@@ -209,8 +483,6 @@ def register():
                 )
 
         # Create user
-        import uuid
-
         user_id = str(uuid.uuid4())
         password_hash = hash_password(password)
 
@@ -218,7 +490,7 @@ def register():
             # Generate token
             token = generate_jwt_token(user_id)
 
-            logger.info(f"User registered: {email}")
+            logger.info("User registered: %s", email)
             return jsonify(
                 create_success_response(
                     {
@@ -236,8 +508,10 @@ def register():
         else:
             return create_error_response("Registration failed", 500)
 
+    except AuthBusyError:
+        return create_error_response("Server busy, please retry", 503)
     except Exception as e:
-        logger.error(f"Registration error: {e}")
+        logger.error("Registration error: %s", e)
         return create_error_response("Internal server error", 500)
 
 
@@ -245,10 +519,9 @@ def register():
 def login():
     """Login user and return JWT token"""
     try:
-        if not request.is_json:
-            return create_error_response("Request must be JSON", 400)
-
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return create_error_response("Request must be a JSON object", 400)
         email = data.get("email", "").strip().lower()
         password = data.get("password", "")
 
@@ -261,20 +534,29 @@ def login():
             return create_error_response("Invalid email or password", 401)
 
         # Verify password
-        if not verify_password(password, user["password_hash"]):
+        if not verify_password_cached(password, user["password_hash"]):
             return create_error_response("Invalid email or password", 401)
 
         # Check if account is active
         if not user.get("is_active", True):
             return create_error_response("Account has been disabled", 403)
 
+        # Move older hashes (e.g. PBKDF2) to the current scheme while the
+        # plaintext password is at hand
+        if password_needs_rehash(user["password_hash"]):
+            try:
+                db_manager.update_user_password(user["id"], hash_password(password))
+            except AuthBusyError:
+                pass  # Retried on the next login
+
         # Update last login
         db_manager.update_user_login(user["id"])
+        invalidate_cached_user(user["id"])
 
         # Generate token
         token = generate_jwt_token(user["id"])
 
-        logger.info(f"User logged in: {email}")
+        logger.info("User logged in: %s", email)
         return jsonify(
             create_success_response(
                 {
@@ -292,27 +574,43 @@ def login():
             )
         )
 
+    except AuthBusyError:
+        return create_error_response("Server busy, please retry", 503)
     except Exception as e:
-        logger.error(f"Login error: {e}")
+        logger.error("Login error: %s", e)
         return create_error_response("Internal server error", 500)
 
 
-@app.route("/auth/logout", methods=["POST"])
+@app.route("/auth/session", methods=["POST"])
 @require_auth
+def create_session_token():
+    """Exchange a JWT for a short-lived session token"""
+    return jsonify(
+        create_success_response(
+            {
+                "session_token": generate_session_token(get_current_user_id()),
+                "expires_in": SESSION_TOKEN_TTL,
+            }
+        )
+    )
+
+
+@app.route("/auth/logout", methods=["POST"])
+@require_session
 def logout():
     """Logout user (invalidate token)"""
     try:
         # In a more complex system, you might want to blacklist the token
         # For now, we just return success and the client discards the token
-        logger.info(f"User logged out: {get_current_user_id()}")
+        logger.info("User logged out: %s", get_current_user_id())
         return jsonify(create_success_response({"message": "Logout successful"}))
     except Exception as e:
-        logger.error(f"Logout error: {e}")
+        logger.error("Logout error: %s", e)
         return create_error_response("Internal server error", 500)
 
 
 @app.route("/auth/me", methods=["GET"])
-@require_auth
+@require_session
 def get_current_user_profile():
     """Get current user profile"""
     try:
@@ -340,19 +638,18 @@ def get_current_user_profile():
         return jsonify(create_success_response({"user": safe_user}))
 
     except Exception as e:
-        logger.error(f"Profile error: {e}")
+        logger.error("Profile error: %s", e)
         return create_error_response("Internal server error", 500)
 
 
 @app.route("/auth/profile", methods=["PUT"])
-@require_auth
+@require_session
 def update_profile():
     """Update user profile"""
     try:
-        if not request.is_json:
-            return create_error_response("Request must be JSON", 400)
-
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return create_error_response("Request must be a JSON object", 400)
         user_id = get_current_user_id()
 
         # Allowed fields to update
@@ -371,6 +668,7 @@ def update_profile():
             allowed_updates["location_country"] = data["location_country"].strip()
 
         if db_manager.update_user_profile(user_id, allowed_updates):
+            invalidate_cached_user(user_id)
             return jsonify(
                 create_success_response({"message": "Profile updated successfully"})
             )
@@ -378,7 +676,7 @@ def update_profile():
             return create_error_response("Failed to update profile", 500)
 
     except Exception as e:
-        logger.error(f"Update profile error: {e}")
+        logger.error("Update profile error: %s", e)
         return create_error_response("Internal server error", 500)
 
 
@@ -387,10 +685,9 @@ def update_profile():
 def change_password():
     """Change user password"""
     try:
-        if not request.is_json:
-            return create_error_response("Request must be JSON", 400)
-
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return create_error_response("Request must be a JSON object", 400)
         current_password = data.get("current_password", "")
         new_password = data.get("new_password", "")
 
@@ -405,60 +702,123 @@ def change_password():
         user = get_current_user()
 
         # Verify current password
-        if not verify_password(current_password, user["password_hash"]):
+        if not verify_password_cached(current_password, user["password_hash"]):
             return create_error_response("Current password is incorrect", 401)
 
         # Update password
         new_hash = hash_password(new_password)
-        if db_manager.update_user_profile(user["id"], {"password_hash": new_hash}):
+        if db_manager.update_user_password(user["id"], new_hash):
+            invalidate_cached_user(user["id"])
             return jsonify(
                 create_success_response({"message": "Password changed successfully"})
             )
         else:
             return create_error_response("Failed to change password", 500)
 
+    except AuthBusyError:
+        return create_error_response("Server busy, please retry", 503)
     except Exception as e:
-        logger.error(f"Change password error: {e}")
+        logger.error("Change password error: %s", e)
         return create_error_response("Internal server error", 500)
 
 
 # API Routes
+def start_session_action(data: dict) -> dict:
+    """Start a session from request data; shared by /start_session and batches"""
+    if "topic" not in data:
+        raise BadRequest("Missing required fields: topic")
+    topic = validate_topic(data["topic"])
+    description = data.get("description", "")
+    if not isinstance(description, str):
+        raise BadRequest("description must be a string")
+    description = description.strip()
+    metadata = data.get("metadata", {})
+
+    # Validate session operation
+    validation = session_manager.validate_session_operation("start", topic=topic)
+    if not validation["valid"]:
+        raise BadRequest(f"Cannot start session: {'; '.join(validation['errors'])}")
+
+    # Start session
+    session_id = session_manager.start_session(topic, description, metadata)
+    invalidate_session_caches()
+
+    # Start activity monitoring
+    if not activity_monitor.start_monitoring(session_id):
+        logger.warning("Activity monitoring failed to start, continuing without it")
+
+    logger.info("Started session: %s with topic: %s", session_id, topic)
+    return {"session_id": session_id}
+
+
+def pause_session_action(pause: Optional[bool] = None) -> Tuple[dict, str]:
+    """Pause or resume the current session; pause=None toggles"""
+    # Check if session exists
+    status = session_manager.get_current_status()
+    if not status["active"]:
+        raise NotFound("No active session to pause/resume")
+
+    if pause is None:
+        pause = status["state"] == "active"
+
+    if pause and status["state"] == "active":
+        # Pause session
+        stats = session_manager.pause_session("manual_pause")
+        activity_monitor.pause_monitoring()
+        message = "Session paused"
+    elif not pause and status["state"] == "paused":
+        # Resume session
+        stats = session_manager.resume_session()
+        activity_monitor.resume_monitoring()
+        message = "Session resumed"
+    else:
+        raise BadRequest("Cannot pause/resume session in current state")
+
+    status_cache.clear()
+    return {"paused": pause, "stats": stats}, message
+
+
+def stop_session_action(data: dict) -> dict:
+    """End the current session; shared by /stop_session and batches"""
+    success = data.get("success", True)
+    completion_notes = data.get("completion_notes", "")
+    if not isinstance(completion_notes, str):
+        raise BadRequest("completion_notes must be a string")
+    completion_notes = completion_notes.strip()
+
+    # Check if session exists
+    status = session_manager.get_current_status()
+    if not status["active"]:
+        raise NotFound("No active session to stop")
+
+    # Stop session
+    session_summary = session_manager.stop_session(success, completion_notes)
+    invalidate_session_caches()
+
+    # Stop activity monitoring
+    activity_monitor.stop_monitoring()
+
+    logger.info("Stopped session: %s", session_summary.get("session_id"))
+    return session_summary
+
+
+START_SESSION_FIELDS = frozenset({"topic"})
+
+
 @app.route("/start_session", methods=["POST"])
 def start_session():
     """Start a new study session"""
     try:
-        data = validate_json_request(["topic"])
-        topic = validate_topic(data["topic"])
-        description = data.get("description", "").strip()
-        metadata = data.get("metadata", {})
-
-        # Validate session operation
-        validation = session_manager.validate_session_operation("start", topic=topic)
-        if not validation["valid"]:
-            return create_error_response(
-                f"Cannot start session: {'; '.join(validation['errors'])}", 400
-            )
-
-        # Start session
-        session_id = session_manager.start_session(topic, description, metadata)
-
-        # Start activity monitoring
-        if not activity_monitor.start_monitoring(session_id):
-            logger.warning("Activity monitoring failed to start, continuing without it")
-
-        logger.info(f"Started session: {session_id} with topic: {topic}")
-        return jsonify(
-            create_success_response(
-                {"session_id": session_id}, "Session started successfully"
-            )
-        )
+        data = validate_json_request(START_SESSION_FIELDS)
+        result = start_session_action(data)
+        return jsonify(create_success_response(result, "Session started successfully"))
 
     except BadRequest as e:
-        return create_error_response(str(e), 400)
+        return create_error_response(e.description, 400)
     except ValueError as e:
         return create_error_response(str(e), 400)
     except Exception as e:
-        logger.error(f"Error starting session: {e}")
+        logger.error("Error starting session: %s", e)
         return create_error_response("Internal server error", 500)
 
 
@@ -466,37 +826,21 @@ def start_session():
 def pause_session():
     """Pause or resume current session"""
     try:
-        # Check if session exists
-        status = session_manager.get_current_status()
-        if not status["active"]:
-            return create_error_response("No active session to pause/resume", 404)
-
-        # Toggle pause state
-        if status["state"] == "active":
-            # Pause session
-            stats = session_manager.pause_session("manual_pause")
-            activity_monitor.pause_monitoring()
-            message = "Session paused"
-            is_paused = True
-        elif status["state"] == "paused":
-            # Resume session
-            stats = session_manager.resume_session()
-            activity_monitor.resume_monitoring()
-            message = "Session resumed"
-            is_paused = False
-        else:
-            return create_error_response(
-                "Cannot pause/resume session in current state", 400
-            )
+        result, message = pause_session_action()
 
-        return jsonify(
-            create_success_response({"paused": is_paused, "stats": stats}, message)
-        )
+        if wants_light_response():
+            return "", 204
 
+        return jsonify(create_success_response(result, message))
+
+    except NotFound as e:
+        return create_error_response(e.description, 404)
+    except BadRequest as e:
+        return create_error_response(e.description, 400)
     except ValueError as e:
         return create_error_response(str(e), 400)
     except Exception as e:
-        logger.error(f"Error pausing/resuming session: {e}")
+        logger.error("Error pausing/resuming session: %s", e)
         return create_error_response("Internal server error", 500)
 
 
@@ -505,88 +849,262 @@ def stop_session():
     """End current session and save to database"""
     try:
         # Handle both JSON and empty request
-        if request.is_json:
-            data = request.get_json() or {}
-        else:
-            data = {}
-
-        success = data.get("success", True)
-        completion_notes = data.get("completion_notes", "").strip()
+        data = request.get_json(silent=True) or {}
+        session_summary = stop_session_action(data)
 
-        # Check if session exists
-        status = session_manager.get_current_status()
-        if not status["active"]:
-            return create_error_response("No active session to stop", 404)
+        if wants_light_response():
+            return "", 204
 
-        # Stop session
-        session_summary = session_manager.stop_session(success, completion_notes)
-
-        # Stop activity monitoring
-        activity_monitor.stop_monitoring()
-
-        logger.info(f"Stopped session: {session_summary.get('session_id')}")
         return jsonify(
             create_success_response(session_summary, "Session completed successfully")
         )
 
+    except NotFound as e:
+        return create_error_response(e.description, 404)
+    except BadRequest as e:
+        return create_error_response(e.description, 400)
     except ValueError as e:
         return create_error_response(str(e), 400)
     except Exception as e:
-        logger.error(f"Error stopping session: {e}")
+        logger.error("Error stopping session: %s", e)
         return create_error_response("Internal server error", 500)
 
 
-@app.route("/get_status", methods=["GET"])
-def get_status():
-    """Get real-time session status and activity"""
+SESSION_BATCH_ACTIONS = {
+    "start": start_session_action,
+    "pause": lambda op: pause_session_action(True)[0],
+    "resume": lambda op: pause_session_action(False)[0],
+    "stop": stop_session_action,
+}
+MAX_SESSION_BATCH_OPS = 50
+SESSION_BATCH_FIELDS = frozenset({"ops"})
+
+
+@app.route("/session/batch", methods=["POST"])
+def session_batch():
+    """Run a list of start/pause/resume/stop operations in one request"""
     try:
-        # Get session status from session manager
-        session_status = session_manager.get_current_status()
+        data = validate_json_request(SESSION_BATCH_FIELDS)
+        ops = data["ops"]
+        if not isinstance(ops, list) or not ops:
+            return create_error_response("ops must be a non-empty list", 400)
+        if len(ops) > MAX_SESSION_BATCH_OPS:
+            return create_error_response(
+                f"Too many ops (max {MAX_SESSION_BATCH_OPS})", 400
+            )
 
-        if not session_status["active"]:
-            return jsonify(
-                create_success_response(
-                    {
-                        "total_seconds": 0,
-                        "active_seconds": 0,
-                        "idle_seconds": 0,
-                        "productivity": 0,
-                        "currently_active": False,
-                        "state": "idle",
-                    }
+        # Operations depend on each other's state, so stop at the first failure
+        # and report how far the batch got
+        results = []
+        failed_index = None
+        for index, op in enumerate(ops):
+            action = op.get("action") if isinstance(op, dict) else None
+            handler = SESSION_BATCH_ACTIONS.get(action)
+            if handler is None:
+                error = "Unknown action"
+            else:
+                try:
+                    results.append(
+                        {"action": action, "success": True, "result": handler(op)}
+                    )
+                    continue
+                except (BadRequest, NotFound) as e:
+                    error = e.description
+                except ValueError as e:
+                    error = str(e)
+                except Exception as e:
+                    logger.error("Error running batch op %s (%s): %s", index, action, e)
+                    error = "Internal server error"
+
+            results.append({"action": action, "success": False, "error": error})
+            failed_index = index
+            break
+
+        return jsonify(
+            {
+                "success": failed_index is None,
+                "completed": len(results) - (failed_index is not None),
+                "failed_index": failed_index,
+                "results": results,
+            }
+        )
+
+    except BadRequest as e:
+        return create_error_response(e.description, 400)
+    except Exception as e:
+        logger.error("Error running session batch: %s", e)
+        return create_error_response("Internal server error", 500)
+
+
+# Status reported while no session is running, pre-encoded for /get_status
+IDLE_STATUS = create_success_response(
+    {
+        "total_seconds": 0,
+        "active_seconds": 0,
+        "idle_seconds": 0,
+        "productivity": 0,
+        "currently_active": False,
+        "state": "idle",
+    }
+)
+IDLE_STATUS_BODY = f"{app.json.dumps(IDLE_STATUS)}\n"
+
+
+def build_status() -> dict:
+    """Build the real-time session status shared by /get_status and the stream"""
+    # Pollers hitting within the same quarter second share one snapshot
+    return status_cache.get_or_compute(None, compute_status)
+
+
+def compute_status() -> dict:
+    """Read the session and activity state into a status response"""
+    # Get session status from session manager
+    session_status = session_manager.get_current_status()
+
+    if not session_status["active"]:
+        return IDLE_STATUS
+
+    # Get activity stats if monitoring is active (reusing the status above)
+    activity_stats = activity_monitor.get_current_stats(session_status)
+
+    # Combine data
+    combined_stats = {
+        "total_seconds": activity_stats.get(
+            "total_seconds", session_status.get("total_seconds", 0)
+        ),
+        "active_seconds": activity_stats.get(
+            "active_seconds", session_status.get("active_seconds", 0)
+        ),
+        "idle_seconds": activity_stats.get(
+            "idle_seconds", session_status.get("idle_seconds", 0)
+        ),
+        "productivity": activity_stats.get(
+            "productivity", session_status.get("productivity", 0)
+        ),
+        "currently_active": activity_stats.get("currently_active", False),
+        "state": session_status.get("state", "unknown"),
+        "intensity": activity_stats.get("intensity", 0.0),
+        "current_session": session_status.get("current_session"),
+    }
+
+    return create_success_response(combined_stats)
+
+
+class StatusBroadcaster:
+    """Builds the status once per interval and fans it out to stream clients"""
+
+    def __init__(
+        self, interval: float = 1.0, max_streams: int = 2, max_age: float = 300
+    ):
+        self.interval = interval
+        # Each open stream pins a server thread, so cap them and end each one
+        # after max_age seconds; EventSource reconnects on its own
+        self.max_streams = max_streams
+        self.max_age = max_age
+        self._condition = threading.Condition()
+        self._frame = None
+        self._generation = 0
+        self._subscribers = 0
+        self._thread = None
+
+    def open_stream(self):
+        """Reserve a stream slot and return its frames, or None when all are taken
+
+        The caller must call release() once the response is closed.
+        """
+        with self._condition:
+            if self._subscribers >= self.max_streams:
+                return None
+            self._subscribers += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, daemon=True, name="StatusBroadcaster"
                 )
-            )
+                self._thread.start()
+            # Send the latest frame straight away if there is one
+            generation = self._generation - 1 if self._frame else self._generation
+        return self._frames(generation)
+
+    def release(self):
+        """Give back the slot reserved by open_stream()"""
+        with self._condition:
+            self._subscribers -= 1
+
+    def _frames(self, generation: int):
+        """Yield Server-Sent Event frames until the stream reaches max_age"""
+        deadline = time.monotonic() + self.max_age
+        while True:
+            with self._condition:
+                while self._generation == generation:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return
+                    self._condition.wait(remaining)
+                generation = self._generation
+                frame = self._frame
+            yield frame
+
+    def _run(self):
+        """Publish a new frame every interval while anyone is subscribed"""
+        while True:
+            with self._condition:
+                if self._subscribers == 0:
+                    self._thread = None
+                    self._frame = None
+                    return
 
-        # Get activity stats if monitoring is active
-        activity_stats = activity_monitor.get_current_stats()
+            try:
+                frame = f"data: {app.json.dumps(build_status())}\n\n"
+                with self._condition:
+                    self._frame = frame
+                    self._generation += 1
+                    self._condition.notify_all()
+            except Exception as e:
+                logger.error("Error building status stream frame: %s", e)
 
-        # Combine data
-        combined_stats = {
-            "total_seconds": activity_stats.get(
-                "total_seconds", session_status.get("total_seconds", 0)
-            ),
-            "active_seconds": activity_stats.get(
-                "active_seconds", session_status.get("active_seconds", 0)
-            ),
-            "idle_seconds": activity_stats.get(
-                "idle_seconds", session_status.get("idle_seconds", 0)
-            ),
-            "productivity": activity_stats.get(
-                "productivity", session_status.get("productivity", 0)
-            ),
-            "currently_active": activity_stats.get("currently_active", False),
-            "state": session_status.get("state", "unknown"),
-            "intensity": activity_stats.get("intensity", 0.0),
-            "current_session": session_status.get("current_session"),
-        }
+            time.sleep(self.interval)
+
+
+status_broadcaster = StatusBroadcaster(
+    max_streams=int(os.getenv("STATUS_STREAM_MAX", 2)),
+    max_age=int(os.getenv("STATUS_STREAM_MAX_AGE", 300)),
+)
+
+
+@app.route("/get_status", methods=["GET"])
+def get_status():
+    """Get real-time session status and activity"""
+    try:
+        status = build_status()
+        if status is IDLE_STATUS:
+            return app.response_class(IDLE_STATUS_BODY, mimetype=app.json.mimetype)
 
-        return jsonify(create_success_response(combined_stats))
+        return jsonify(status)
 
     except Exception as e:
-        logger.error(f"Error getting status: {e}")
+        logger.error("Error getting status: %s", e)
         return create_error_response("Internal server error", 500)
 
 
+@app.route("/status_stream", methods=["GET"])
+def status_stream():
+    """Stream real-time session status as Server-Sent Events"""
+    frames = status_broadcaster.open_stream()
+    if frames is None:
+        # All stream slots are taken; the client falls back to /get_status
+        response, status_code = create_error_response("Too many status streams", 503)
+        response.headers["Retry-After"] = "60"
+        return response, status_code
+
+    response = Response(
+        frames,
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+    response.call_on_close(status_broadcaster.release)
+    return response
+
+
 @app.route("/get_sessions", methods=["GET"])
 def get_sessions():
     """Retrieve session history"""
@@ -599,32 +1117,15 @@ def get_sessions():
         date_from = request.args.get("date_from")
         date_to = request.args.get("date_to")
 
-        # Get sessions from database
-        sessions = db_manager.get_sessions(
-            limit=limit, offset=offset, date_from=date_from, date_to=date_to
+        formatted_sessions = sessions_cache.get_or_compute(
+            (limit, offset, date_from, date_to),
+            lambda: format_sessions(
+                db_manager.get_session_rows(
+                    limit=limit, offset=offset, date_from=date_from, date_to=date_to
+                )
+            ),
         )
 
-        # Format response
-        formatted_sessions = []
-        for session in sessions:
-            formatted_sessions.append(
-                {
-                    "id": session["id"],
-                    "topic": session["topic"],
-                    "description": session.get("description", ""),
-                    "date": session["start_time"][:10] if session["start_time"] else "",
-                    "start_time": session["start_time"],
-                    "end_time": session.get("end_time", ""),
-                    "active_minutes": (session.get("active_seconds", 0) or 0) // 60,
-                    "idle_minutes": (session.get("idle_seconds", 0) or 0) // 60,
-                    "total_minutes": (session.get("total_seconds", 0) or 0) // 60,
-                    "productivity": round(session.get("productivity", 0) or 0, 1),
-                    "success": session.get("success", True),
-                    "completion_notes": session.get("completion_notes", ""),
-                    "created_at": session["created_at"],
-                }
-            )
-
         return jsonify(
             create_success_response(
                 {
@@ -637,7 +1138,7 @@ def get_sessions():
         )
 
     except Exception as e:
-        logger.error(f"Error getting sessions: {e}")
+        logger.error("Error getting sessions: %s", e)
         return create_error_response("Internal server error", 500)
 
 
@@ -645,13 +1146,20 @@ def get_sessions():
 def get_stats():
     """Get aggregated statistics"""
     try:
-        stats = db_manager.get_statistics()
-        return jsonify(
-            create_success_response(stats, "Statistics retrieved successfully")
+        # Cache the encoded body so polling dashboards skip serialization too
+        body = stats_cache.get_or_compute(
+            None,
+            lambda: app.json.dumps(
+                create_success_response(
+                    db_manager.get_statistics(), "Statistics retrieved successfully"
+                )
+            ),
         )
+        # Stats change as soon as a session ends, so clients must revalidate
+        return conditional_json_response(body)
 
     except Exception as e:
-        logger.error(f"Error getting stats: {e}")
+        logger.error("Error getting stats: %s", e)
         return create_error_response("Internal server error", 500)
 
 
@@ -659,22 +1167,28 @@ def get_stats():
 def export_csv():
     """Export sessions as CSV file"""
     try:
-        csv_data = db_manager.export_sessions_csv()
+        # Stream rows as they are read instead of building the whole file; the
+        # header chunk comes after the query runs, so query errors surface here
+        csv_chunks = db_manager.iter_sessions_csv()
+        header = next(csv_chunks)
 
         response = Response(
-            csv_data,
+            chain((header,), csv_chunks),
             mimetype="text/csv",
             headers={
                 "Content-Disposition": "attachment; filename=study_sessions.csv",
                 "Content-Type": "text/csv; charset=utf-8",
             },
         )
+        # chain() has no close(), so release the query's connection explicitly
+        # when the response ends, including on client disconnect
+        response.call_on_close(csv_chunks.close)
 
         logger.info("Exported sessions to CSV")
         return response
 
     except Exception as e:
-        logger.error(f"Error exporting CSV: {e}")
+        logger.error("Error exporting CSV: %s", e)
         return create_error_response("Export failed", 500)
 
 
@@ -693,33 +1207,35 @@ def import_csv():
         if not file.filename.lower().endswith(".csv"):
             return create_error_response("File must be a CSV file", 400)
 
-        # Check file size (max 10MB)
-        file.seek(0, 2)  # Seek to end
-        size = file.tell()
-        file.seek(0)  # Seek back to beginning
+        # Check file size (max 10MB); a request body within the limit can't hold
+        # a larger file, so only measure the upload when the body is bigger
+        max_size = 10 * 1024 * 1024
+        if request.content_length is None or request.content_length > max_size:
+            file.seek(0, 2)  # Seek to end
+            size = file.tell()
+            file.seek(0)  # Seek back to beginning
 
-        if size > 10 * 1024 * 1024:
-            return create_error_response("File too large (max 10MB)", 413)
+            if size > max_size:
+                return create_error_response("File too large (max 10MB)", 413)
 
-        # Read CSV content
+        # Import sessions, decoding the upload line by line as it is parsed
         try:
-            csv_content = file.read().decode("utf-8")
+            imported_count, errors = db_manager.import_sessions_csv(
+                line.decode("utf-8") for line in file.stream
+            )
         except UnicodeDecodeError:
-            try:
-                # Try with different encoding
-                file.seek(0)
-                csv_content = file.read().decode("latin-1")
-            except:
-                return create_error_response("Unable to read file content", 400)
-
-        # Import sessions
-        imported_count, errors = db_manager.import_sessions_csv(csv_content)
+            # Try with different encoding (the failed attempt was rolled back)
+            file.seek(0)
+            imported_count, errors = db_manager.import_sessions_csv(
+                line.decode("latin-1") for line in file.stream
+            )
+        invalidate_session_caches()
 
         message = f"Successfully imported {imported_count} sessions"
         if errors:
             message += f" with {len(errors)} errors"
 
-        logger.info(f"Imported {imported_count} sessions from CSV")
+        logger.info("Imported %s sessions from CSV", imported_count)
 
         response_data = {
             "imported_count": imported_count,
@@ -730,13 +1246,20 @@ def import_csv():
         return jsonify(create_success_response(response_data, message))
 
     except Exception as e:
-        logger.error(f"Error importing CSV: {e}")
+        logger.error("Error importing CSV: %s", e)
         return create_error_response("Import failed", 500)
 
 
 # ==================== CONTRIBUTION MAP ROUTES ====================
 
-from contribution_map import ContributionMap, get_contribution_map
+from contribution_map import ContributionMap
+
+# Shares db_manager (and its per-thread connections) instead of opening a new
+# DatabaseManager, which re-runs schema setup, on every request
+heatmap_generator = ContributionMap(db_manager)
+
+# Month labels depend only on the date range, so keep them for the day
+month_labels_cache = TTLCache(ttl=24 * 60 * 60, maxsize=64)
 
 
 @app.route("/heatmap", methods=["GET"])
@@ -753,18 +1276,25 @@ def get_heatmap():
         user_id = get_current_user_id()
 
         # Generate heatmap
-        generator = ContributionMap()
-        data = generator.generate_heatmap_data(user_id, days)
+        data = heatmap_generator.generate_heatmap_data(user_id, days)
 
         # Add month labels
-        start_date = datetime.strptime(data["date_range"]["start"], "%Y-%m-%d")
-        end_date = datetime.strptime(data["date_range"]["end"], "%Y-%m-%d")
-        data["month_labels"] = generator.get_month_labels(start_date, end_date)
+        start, end = data["date_range"]["start"], data["date_range"]["end"]
+        data["month_labels"] = month_labels_cache.get_or_compute(
+            (start, end),
+            lambda: heatmap_generator.get_month_labels(
+                datetime.fromisoformat(start), datetime.fromisoformat(end)
+            ),
+        )
 
-        return jsonify(create_success_response(data, "Heatmap generated successfully"))
+        body = app.json.dumps(
+            create_success_response(data, "Heatmap generated successfully")
+        )
+        # The body depends on who is asking, so caches must key on the token
+        return conditional_json_response(body, max_age=30, vary=("Authorization",))
 
     except Exception as e:
-        logger.error(f"Error generating heatmap: {e}")
+        logger.error("Error generating heatmap: %s", e)
         return create_error_response("Failed to generate heatmap", 500)
 
 
@@ -775,7 +1305,7 @@ def get_heatmap_stats():
     try:
         user_id = get_current_user_id()
 
-        data = get_contribution_map(user_id, days=365)
+        data = heatmap_generator.generate_heatmap_data(user_id, 365)
 
         # Return just the key stats
         stats = {
@@ -787,7 +1317,7 @@ def get_heatmap_stats():
         return jsonify(create_success_response(stats, "Statistics retrieved"))
 
     except Exception as e:
-        logger.error(f"Error getting heatmap stats: {e}")
+        logger.error("Error getting heatmap stats: %s", e)
         return create_error_response("Failed to get statistics", 500)
 
 
@@ -800,8 +1330,7 @@ def export_heatmap_svg():
         days = request.args.get("days", 365, type=int)
 
         # Generate SVG
-        generator = ContributionMap()
-        svg = generator.export_svg(user_id, days)
+        svg = heatmap_generator.export_svg(user_id, days)
 
         if not svg:
             return create_error_response("No data to export", 404)
@@ -814,7 +1343,7 @@ def export_heatmap_svg():
         return response
 
     except Exception as e:
-        logger.error(f"Error exporting heatmap SVG: {e}")
+        logger.error("Error exporting heatmap SVG: %s", e)
         return create_error_response("Export failed", 500)
 
 
@@ -825,8 +1354,7 @@ def get_share_text():
     try:
         user_id = get_current_user_id()
 
-        generator = ContributionMap()
-        text = generator.get_share_text(user_id)
+        text = heatmap_generator.get_share_text(user_id)
 
         return jsonify(
             create_success_response(
@@ -839,13 +1367,24 @@ def get_share_text():
         )
 
     except Exception as e:
-        logger.error(f"Error generating share text: {e}")
+        logger.error("Error generating share text: %s", e)
         return create_error_response("Failed to generate share text", 500)
 
 
 # ==================== STUDY MATERIALS ROUTES ====================
 
-material_manager = MaterialManager()
+material_manager = MaterialManager(db_manager)
+
+# Public listings and popular tags change slowly; both are cleared whenever a
+# material is uploaded, deleted or rated
+materials_cache = TTLCache(ttl=60, maxsize=256)
+tags_cache = TTLCache(ttl=300, maxsize=1)
+
+
+def invalidate_material_caches():
+    """Drop cached material listings and tags after materials change"""
+    materials_cache.clear()
+    tags_cache.clear()
 
 
 @app.route("/materials/upload", methods=["POST"])
@@ -863,6 +1402,9 @@ def upload_material():
         if file.filename == "":
             return create_error_response("No file selected", 400)
 
+        if not material_manager.allowed_file(file.filename):
+            return create_error_response("Unsupported file type", 415)
+
         # Get form data
         title = request.form.get("title", "").strip()
         description = request.form.get("description", "").strip()
@@ -886,6 +1428,7 @@ def upload_material():
         )
 
         if result["success"]:
+            invalidate_material_caches()
             return jsonify(
                 create_success_response(
                     {
@@ -901,7 +1444,7 @@ def upload_material():
             return create_error_response(result["error"], 400)
 
     except Exception as e:
-        logger.error(f"Error uploading material: {e}")
+        logger.error("Error uploading material: %s", e)
         return create_error_response("Upload failed", 500)
 
 
@@ -913,22 +1456,25 @@ def list_materials():
         query = request.args.get("q", "").strip()
         subject = request.args.get("subject", "").strip()
         tags = request.args.get("tags", "").strip()
-        user_id = request.args.get("user_id", "").strip()
         limit = min(request.args.get("limit", 50, type=int), 100)
         offset = max(request.args.get("offset", 0, type=int), 0)
 
         # Parse tags
         tags_list = [t.strip() for t in tags.split(",") if t.strip()] if tags else None
 
-        # Search materials
-        materials = material_manager.search_materials(
-            query=query if query else None,
-            subject=subject if subject else None,
-            tags=tags_list,
-            user_id=user_id if user_id else None,
-            only_public=True,
-            limit=limit,
-            offset=offset,
+        # Search materials (public only, so one cache serves every caller;
+        # a failed search raises, so an empty error result is never cached)
+        cache_key = (query, subject, tuple(tags_list or ()), limit, offset)
+        materials = materials_cache.get_or_compute(
+            cache_key,
+            lambda: material_manager.search_materials(
+                query=query if query else None,
+                subject=subject if subject else None,
+                tags=tags_list,
+                only_public=True,
+                limit=limit,
+                offset=offset,
+            ),
         )
 
         return jsonify(
@@ -943,7 +1489,7 @@ def list_materials():
         )
 
     except Exception as e:
-        logger.error(f"Error listing materials: {e}")
+        logger.error("Error listing materials: %s", e)
         return create_error_response("Failed to retrieve materials", 500)
 
 
@@ -962,7 +1508,7 @@ def get_material(material_id):
         return jsonify(create_success_response({"material": material}))
 
     except Exception as e:
-        logger.error(f"Error getting material: {e}")
+        logger.error("Error getting material: %s", e)
         return create_error_response("Failed to retrieve material", 500)
 
 
@@ -982,17 +1528,23 @@ def download_material(material_id):
         if not file_path or not os.path.exists(file_path):
             return create_error_response("File not found on server", 404)
 
-        # Send file
-        from flask import send_file
-
-        return send_file(
-            file_path,
+        relative_path = os.path.relpath(file_path, UPLOAD_FOLDER).replace(os.sep, "/")
+        response = send_from_directory(
+            UPLOAD_FOLDER,
+            relative_path,
             as_attachment=True,
             download_name=f"{material['title']}{material['file_type']}",
         )
 
+        if X_ACCEL_REDIRECT_PREFIX and "X-Sendfile" in response.headers:
+            del response.headers["X-Sendfile"]
+            response.headers["X-Accel-Redirect"] = (
+                X_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + relative_path
+            )
+        return response
+
     except Exception as e:
-        logger.error(f"Error downloading material: {e}")
+        logger.error("Error downloading material: %s", e)
         return create_error_response("Download failed", 500)
 
 
@@ -1004,6 +1556,7 @@ def delete_material(material_id):
         user_id = get_current_user_id()
 
         if material_manager.delete_material(material_id, user_id):
+            invalidate_material_caches()
             return jsonify(
                 create_success_response({"message": "Material deleted successfully"})
             )
@@ -1013,7 +1566,7 @@ def delete_material(material_id):
             )
 
     except Exception as e:
-        logger.error(f"Error deleting material: {e}")
+        logger.error("Error deleting material: %s", e)
         return create_error_response("Delete failed", 500)
 
 
@@ -1024,10 +1577,9 @@ def rate_material(material_id):
     try:
         user_id = get_current_user_id()
 
-        if not request.is_json:
-            return create_error_response("Request must be JSON", 400)
-
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return create_error_response("Request must be a JSON object", 400)
         rating = data.get("rating", 0)
         comment = data.get("comment", "").strip()
 
@@ -1035,12 +1587,13 @@ def rate_material(material_id):
             return create_error_response("Rating must be between 1 and 5", 400)
 
         if material_manager.rate_material(material_id, user_id, rating, comment):
+            invalidate_material_caches()
             return jsonify(create_success_response({"message": "Rating submitted"}))
         else:
             return create_error_response("Failed to submit rating", 500)
 
     except Exception as e:
-        logger.error(f"Error rating material: {e}")
+        logger.error("Error rating material: %s", e)
         return create_error_response("Rating failed", 500)
 
 
@@ -1048,10 +1601,12 @@ def rate_material(material_id):
 def get_popular_tags():
     """Get popular subject tags"""
     try:
-        tags = material_manager.get_popular_tags(limit=20)
+        tags = tags_cache.get_or_compute(
+            None, lambda: material_manager.get_popular_tags(limit=20)
+        )
         return jsonify(create_success_response({"tags": tags}))
     except Exception as e:
-        logger.error(f"Error getting tags: {e}")
+        logger.error("Error getting tags: %s", e)
         return create_error_response("Failed to get tags", 500)
 
 
@@ -1059,7 +1614,7 @@ def get_popular_tags():
 
 from study_buddy import StudyBuddySystem, get_study_buddy_system
 
-buddy_system = StudyBuddySystem()
+buddy_system = StudyBuddySystem(db_manager)
 
 
 @app.route("/buddies/nearby", methods=["GET"])
@@ -1093,7 +1648,7 @@ def find_nearby_buddies():
         )
 
     except Exception as e:
-        logger.error(f"Error finding nearby buddies: {e}")
+        logger.error("Error finding nearby buddies: %s", e)
         return create_error_response("Failed to find nearby users", 500)
 
 
@@ -1102,10 +1657,9 @@ def find_nearby_buddies():
 def update_location():
     """Update user's location for nearby discovery"""
     try:
-        if not request.is_json:
-            return create_error_response("Request must be JSON", 400)
-
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return create_error_response("Request must be a JSON object", 400)
         user_id = get_current_user_id()
 
         lat = data.get("lat")
@@ -1121,6 +1675,7 @@ def update_location():
             return create_error_response("Invalid coordinates", 400)
 
         if buddy_system.update_user_location(user_id, lat, lon, city, country):
+            invalidate_cached_user(user_id)
             return jsonify(
                 create_success_response({"message": "Location updated successfully"})
             )
@@ -1128,7 +1683,7 @@ def update_location():
             return create_error_response("Failed to update location", 500)
 
     except Exception as e:
-        logger.error(f"Error updating location: {e}")
+        logger.error("Error updating location: %s", e)
         return create_error_response("Update failed", 500)
 
 
@@ -1137,10 +1692,9 @@ def update_location():
 def send_buddy_request():
     """Send a study buddy request"""
     try:
-        if not request.is_json:
-            return create_error_response("Request must be JSON", 400)
-
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return create_error_response("Request must be a JSON object", 400)
         requester_id = get_current_user_id()
         recipient_id = data.get("user_id", "").strip()
         message = data.get("message", "").strip()
@@ -1166,7 +1720,7 @@ def send_buddy_request():
             return create_error_response(result["error"], 400)
 
     except Exception as e:
-        logger.error(f"Error sending buddy request: {e}")
+        logger.error("Error sending buddy request: %s", e)
         return create_error_response("Request failed", 500)
 
 
@@ -1183,7 +1737,7 @@ def get_buddy_requests():
         )
 
     except Exception as e:
-        logger.error(f"Error getting buddy requests: {e}")
+        logger.error("Error getting buddy requests: %s", e)
         return create_error_response("Failed to get requests", 500)
 
 
@@ -1192,10 +1746,9 @@ def get_buddy_requests():
 def respond_to_request():
     """Accept or reject a buddy request"""
     try:
-        if not request.is_json:
-            return create_error_response("Request must be JSON", 400)
-
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return create_error_response("Request must be a JSON object", 400)
         user_id = get_current_user_id()
         requester_id = data.get("requester_id", "").strip()
         accept = data.get("accept", False)
@@ -1212,7 +1765,7 @@ def respond_to_request():
             return create_error_response("Failed to process request", 500)
 
     except Exception as e:
-        logger.error(f"Error responding to request: {e}")
+        logger.error("Error responding to request: %s", e)
         return create_error_response("Failed to respond", 500)
 
 
@@ -1229,7 +1782,7 @@ def get_my_buddies():
         )
 
     except Exception as e:
-        logger.error(f"Error getting buddies: {e}")
+        logger.error("Error getting buddies: %s", e)
         return create_error_response("Failed to get buddies", 500)
 
 
@@ -1238,10 +1791,9 @@ def get_my_buddies():
 def remove_buddy():
     """Remove a study buddy"""
     try:
-        if not request.is_json:
-            return create_error_response("Request must be JSON", 400)
-
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return create_error_response("Request must be a JSON object", 400)
         user_id = get_current_user_id()
         buddy_id = data.get("buddy_id", "").strip()
 
@@ -1256,44 +1808,47 @@ def remove_buddy():
             return create_error_response("Failed to remove buddy", 500)
 
     except Exception as e:
-        logger.error(f"Error removing buddy: {e}")
+        logger.error("Error removing buddy: %s", e)
         return create_error_response("Removal failed", 500)
 
 
 # Health check endpoint
+def build_health_status() -> dict:
+    """Probe the database and activity monitor for /health"""
+    db_health = db_manager.health_check()
+    activity_health = activity_monitor.get_health_status()
+
+    overall_status = "healthy"
+    if db_health.get("status") != "healthy" or not activity_health.get(
+        "permissions_ok", False
+    ):
+        overall_status = "degraded"
+
+    return create_success_response(
+        {
+            "status": overall_status,
+            "timestamp": iso_now(),
+            "database": db_health,
+            "activity_monitor": activity_health,
+            "version": "1.0.0",
+        }
+    )
+
+
 @app.route("/health", methods=["GET"])
 def health_check():
     """Health check endpoint for monitoring"""
     try:
-        db_health = db_manager.health_check()
-        activity_health = activity_monitor.get_health_status()
-
-        overall_status = "healthy"
-        if db_health.get("status") != "healthy" or not activity_health.get(
-            "permissions_ok", False
-        ):
-            overall_status = "degraded"
-
-        return jsonify(
-            create_success_response(
-                {
-                    "status": overall_status,
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "database": db_health,
-                    "activity_monitor": activity_health,
-                    "version": "1.0.0",
-                }
-            )
-        )
+        return jsonify(health_cache.get_or_compute(None, build_health_status))
 
     except Exception as e:
-        logger.error(f"Error in health check: {e}")
+        logger.error("Error in health check: %s", e)
         return jsonify(
             {
                 "success": False,
                 "status": "error",
                 "error": str(e),
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": iso_now(),
             }
         ), 500
 
@@ -1323,13 +1878,13 @@ def payload_too_large(error):
 
 @app.errorhandler(500)
 def internal_error(error):
-    logger.error(f"Internal server error: {error}")
+    logger.error("Internal server error: %s", error)
     return create_error_response("Internal server error", 500)
 
 
 @app.errorhandler(Exception)
 def handle_unexpected_error(error):
-    logger.error(f"Unexpected error: {type(error).__name__}: {error}")
+    logger.error("Unexpected error: %s: %s", type(error).__name__, error)
     if config.debug:
         return create_error_response(f"Unexpected error: {error}", 500)
     else:
@@ -1356,9 +1911,9 @@ def shutdown():
 
 
 if __name__ == "__main__":
-    logger.info(f"Starting Study Tracker server on {config.host}:{config.port}")
-    logger.info(f"Debug mode: {config.debug}")
-    logger.info(f"Database: {db_manager.db_path}")
+    logger.info("Starting Study Tracker server on %s:%s", config.host, config.port)
+    logger.info("Debug mode: %s", config.debug)
+    logger.info("Database: %s", db_manager.db_path)
 
     # Start server
     app.run(host=config.host, port=config.port, debug=config.debug, threaded=True)
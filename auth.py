@@ -3,27 +3,141 @@ Authentication utilities for Study Tracker
 Handles JWT tokens, password hashing, and auth middleware
 """
 
+import os
+import re
 import jwt
+import hmac
+import time
+import threading
 import uuid
+import base64
+import hashlib
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from functools import wraps
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask import request, jsonify, g
-from database import DatabaseManager
+from database import db_manager
 from config import config
+from utils import TTLCache
 import logging
 
+# Import argon2 with error handling (falls back to Werkzeug's PBKDF2)
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import VerificationError, InvalidHashError
+
+    ARGON2_AVAILABLE = True
+except ImportError:
+    ARGON2_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Argon2id in native code; hashes carry their own parameters, so these can be
+# raised later and old hashes are upgraded on the next login
+password_hasher = (
+    PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=2)
+    if ARGON2_AVAILABLE
+    else None
+)
+
+# Recently verified (hash, password) pairs; only successes are ever stored
+verified_password_cache = TTLCache(ttl=30, maxsize=4096)
+
+EMAIL_RE = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+USERNAME_INVALID_CHARS_RE = re.compile(r"[^a-z0-9_]")
+
+# User rows looked up by the auth decorators, keyed by user ID
+user_cache = TTLCache(ttl=60, maxsize=5000)
+
+# Payloads of recently verified JWTs, keyed by a 16-byte digest of the token
+decoded_token_cache = TTLCache(ttl=60, maxsize=4096)
+
+# Password hashing is CPU-bound (hashlib releases the GIL while it runs), so
+# cap how many request threads can be inside it at once and leave the rest
+# free for cheap requests such as status polling
+KDF_MAX_CONCURRENCY = max(1, (os.cpu_count() or 2) // 2)
+KDF_WAIT_SECONDS = 2.0
+_kdf_slots = threading.BoundedSemaphore(KDF_MAX_CONCURRENCY)
+
+# Lifetime of the HMAC session tokens handed out by /auth/session
+SESSION_TOKEN_TTL = 300
+
+# Session tokens are signed with a key derived from, not equal to, the JWT secret
+SESSION_TOKEN_KEY = hashlib.sha256(
+    b"session-token|" + config.security.secret_key.encode()
+).digest()
+
+
+@contextmanager
+def _kdf_slot():
+    """Hold one of the KDF slots, raising AuthBusyError if none frees up"""
+    if not _kdf_slots.acquire(timeout=KDF_WAIT_SECONDS):
+        raise AuthBusyError("Too many concurrent password operations")
+    try:
+        yield
+    finally:
+        _kdf_slots.release()
+
 
 def hash_password(password: str) -> str:
     """Hash a password for storing"""
-    return generate_password_hash(password, method="pbkdf2:sha256", salt_length=16)
+    with _kdf_slot():
+        if ARGON2_AVAILABLE:
+            return password_hasher.hash(password)
+        return generate_password_hash(password, method="pbkdf2:sha256", salt_length=16)
 
 
 def verify_password(password: str, password_hash: str) -> bool:
-    """Verify a password against a hash"""
-    return check_password_hash(password_hash, password)
+    """Verify a password against an Argon2 or Werkzeug PBKDF2 hash"""
+    if not password_hash.startswith("$argon2"):
+        with _kdf_slot():
+            return check_password_hash(password_hash, password)
+
+    if not ARGON2_AVAILABLE:
+        logger.error("Argon2 password hash found but argon2-cffi is not installed")
+        return False
+
+    with _kdf_slot():
+        try:
+            return password_hasher.verify(password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+
+
+def password_needs_rehash(password_hash: str) -> bool:
+    """Whether a stored hash should be replaced with one from hash_password"""
+    if not ARGON2_AVAILABLE:
+        return False
+    if not password_hash.startswith("$argon2"):
+        return True
+    return password_hasher.check_needs_rehash(password_hash)
+
+
+def verify_password_cached(password: str, password_hash: str) -> bool:
+    """Verify a password, skipping the KDF if it was verified in the last 30s"""
+    key = hashlib.sha256(f"{password_hash}|{password}".encode()).digest()
+    if verified_password_cache.get(key):
+        return True
+
+    if not verify_password(password, password_hash):
+        return False
+
+    verified_password_cache.set(key, True)
+    return True
+
+
+def get_user_cached(user_id: str) -> dict:
+    """Get a user by ID, reusing the row for up to a minute"""
+    # Misses aren't cached, so a user created right after a failed lookup works
+    return user_cache.get_or_compute(
+        user_id, lambda: db_manager.get_user_by_id(user_id), cache_none=False
+    )
+
+
+def invalidate_cached_user(user_id: str):
+    """Forget the cached row after the user's record changes"""
+    user_cache.delete(user_id)
 
 
 def generate_jwt_token(user_id: str, expires_days: int = 30) -> str:
@@ -41,8 +155,14 @@ def generate_jwt_token(user_id: str, expires_days: int = 30) -> str:
 
 def decode_jwt_token(token: str) -> dict:
     """Decode and validate a JWT token"""
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    payload = decoded_token_cache.get(key)
+    if payload is not None and payload.get("exp", 0) > time.time():
+        return payload
+
     try:
         payload = jwt.decode(token, config.security.secret_key, algorithms=["HS256"])
+        decoded_token_cache.set(key, payload)
         return payload
     except jwt.ExpiredSignatureError:
         return {"error": "Token expired"}
@@ -50,6 +170,45 @@ def decode_jwt_token(token: str) -> dict:
         return {"error": "Invalid token"}
 
 
+def _sign_session_payload(payload: bytes) -> str:
+    """Return the base64url HMAC-SHA256 signature of a session token payload"""
+    digest = hmac.new(SESSION_TOKEN_KEY, payload, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def generate_session_token(user_id: str, ttl: int = SESSION_TOKEN_TTL) -> str:
+    """Generate a short-lived HMAC session token for a user"""
+    exp = int(time.time()) + ttl
+    payload = base64.urlsafe_b64encode(f"{user_id}|{exp}".encode()).rstrip(b"=")
+    return f"{payload.decode('ascii')}.{_sign_session_payload(payload)}"
+
+
+def decode_session_token(token: str) -> str:
+    """Return the user ID of a valid, unexpired session token, or None"""
+    payload, _, signature = token.partition(".")
+    if not payload or not signature:
+        return None
+
+    payload_bytes = payload.encode("ascii", "ignore")
+    if not hmac.compare_digest(signature, _sign_session_payload(payload_bytes)):
+        return None
+
+    try:
+        decoded = base64.urlsafe_b64decode(payload_bytes + b"=" * (-len(payload) % 4))
+        user_id, _, exp = decoded.decode().rpartition("|")
+        if int(exp) <= time.time():
+            return None
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+    return user_id or None
+
+
+def is_session_token(token: str) -> bool:
+    """Session tokens have two dot-separated parts, JWTs have three"""
+    return token.count(".") == 1
+
+
 def get_auth_token_from_request() -> str:
     """Extract auth token from request headers"""
     auth_header = request.headers.get("Authorization", "")
@@ -66,6 +225,29 @@ def get_auth_token_from_request() -> str:
     return None
 
 
+def reject_unusable_user(user: dict):
+    """Return the error response for a missing or disabled user, else None"""
+    if not user:
+        return jsonify(
+            {
+                "success": False,
+                "error": "User not found",
+                "message": "The user associated with this token no longer exists",
+            }
+        ), 401
+
+    if not user.get("is_active", True):
+        return jsonify(
+            {
+                "success": False,
+                "error": "Account disabled",
+                "message": "This account has been disabled",
+            }
+        ), 403
+
+    return None
+
+
 def require_auth(f):
     """Decorator to require authentication for a route"""
 
@@ -95,30 +277,50 @@ def require_auth(f):
             ), 401
 
         # Get user from database
-        db = DatabaseManager()
-        user = db.get_user_by_id(payload.get("user_id"))
+        user = get_user_cached(payload.get("user_id"))
+
+        rejection = reject_unusable_user(user)
+        if rejection:
+            return rejection
+
+        # Store user info in Flask's g object for use in the route
+        g.current_user = user
+        g.user_id = user["id"]
+
+        return f(*args, **kwargs)
+
+    return decorated_function
+
+
+def require_session(f):
+    """Decorator accepting a session token (HMAC check) or a full JWT"""
+    jwt_route = require_auth(f)
 
-        if not user:
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        token = get_auth_token_from_request()
+
+        if not token or not is_session_token(token):
+            return jwt_route(*args, **kwargs)
+
+        user_id = decode_session_token(token)
+        if not user_id:
             return jsonify(
                 {
                     "success": False,
-                    "error": "User not found",
-                    "message": "The user associated with this token no longer exists",
+                    "error": "Invalid token",
+                    "message": "Session token is invalid or expired",
                 }
             ), 401
 
-        if not user.get("is_active", True):
-            return jsonify(
-                {
-                    "success": False,
-                    "error": "Account disabled",
-                    "message": "This account has been disabled",
-                }
-            ), 403
+        # The token can outlive the account, so check the (cached) user row too
+        user = get_user_cached(user_id)
+        rejection = reject_unusable_user(user)
+        if rejection:
+            return rejection
 
-        # Store user info in Flask's g object for use in the route
         g.current_user = user
-        g.user_id = user["id"]
+        g.user_id = user_id
 
         return f(*args, **kwargs)
 
@@ -127,7 +329,11 @@ def require_auth(f):
 
 def get_current_user() -> dict:
     """Get the current authenticated user from request context"""
-    return getattr(g, "current_user", None)
+    user = getattr(g, "current_user", None)
+    if user is None and getattr(g, "user_id", None):
+        user = get_user_cached(g.user_id)
+        g.current_user = user
+    return user
 
 
 def get_current_user_id() -> str:
@@ -145,8 +351,7 @@ def optional_auth(f):
         if token:
             payload = decode_jwt_token(token)
             if "error" not in payload:
-                db = DatabaseManager()
-                user = db.get_user_by_id(payload.get("user_id"))
+                user = get_user_cached(payload.get("user_id"))
                 if user and user.get("is_active", True):
                     g.current_user = user
                     g.user_id = user["id"]
@@ -158,10 +363,7 @@ def optional_auth(f):
 
 def validate_email(email: str) -> bool:
     """Basic email validation"""
-    import re
-
-    pattern = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
-    return re.match(pattern, email) is not None
+    return EMAIL_RE.match(email) is not None
 
 
 def validate_password(password: str) -> tuple:
@@ -187,9 +389,7 @@ def sanitize_username(username: str) -> str:
     username = username.strip().lower()
 
     # Remove special characters, allow only alphanumeric and underscore
-    import re
-
-    username = re.sub(r"[^a-z0-9_]", "", username)
+    username = USERNAME_INVALID_CHARS_RE.sub("", username)
 
     # Limit length
     username = username[:30]
@@ -203,6 +403,12 @@ class AuthError(Exception):
     pass
 
 
+class AuthBusyError(AuthError):
+    """Raised when every password hashing slot stays busy for too long"""
+
+    pass
+
+
 # Development helper - create test user
 def create_test_user(
     email: str = "test@example.com",
@@ -210,7 +416,7 @@ def create_test_user(
     username: str = "testuser",
 ):
     """Create a test user for development"""
-    db = DatabaseManager()
+    db = db_manager
 
     # Check if user exists
     existing = db.get_user_by_email(email)
@@ -1,19 +1,36 @@
 import sqlite3
 import os
+import math
 import json
 import logging
+import threading
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Tuple
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Tuple, Union
 from contextlib import contextmanager
 from config import config
+from utils import EARTH_RADIUS_KM, haversine_term, haversine_term_to_km
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever init_database() gains a table, column or index
+SCHEMA_VERSION = 3
+
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180  # along a meridian
+
+# Columns returned by DatabaseManager.get_session_rows, in order
+SESSION_ROW_COLUMNS = """
+    id, topic, description, start_time, end_time,
+    COALESCE(active_seconds, 0), COALESCE(idle_seconds, 0),
+    COALESCE(total_seconds, 0), ROUND(COALESCE(productivity, 0), 1),
+    success, completion_notes, created_at
+"""
+
 
 class DatabaseManager:
     def __init__(self, db_path: Optional[str] = None):
         self.db_path = db_path or config.database.path
         self.max_sessions = config.database.max_sessions
+        self._local = threading.local()  # per-thread reusable connection
         self.init_database()
 
     def init_database(self):
@@ -25,6 +42,12 @@ class DatabaseManager:
 
         with sqlite3.connect(self.db_path) as conn:
             conn.execute("PRAGMA foreign_keys = ON")
+            # WAL lets the activity writer commit batches without blocking readers
+            conn.execute("PRAGMA journal_mode = WAL")
+
+            # Skip the DDL below when the schema is already current
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+                return
 
             # Sessions table
             conn.execute("""
@@ -170,6 +193,11 @@ class DatabaseManager:
             conn.execute(
                 "CREATE INDEX IF NOT EXISTS idx_sessions_date ON study_sessions(date(start_time))"
             )
+            # Serves "WHERE success = TRUE ORDER BY start_time" without a sort
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_sessions_success_start "
+                "ON study_sessions(success, start_time)"
+            )
             conn.execute(
                 "CREATE INDEX IF NOT EXISTS idx_sessions_topic ON study_sessions(topic)"
             )
@@ -185,6 +213,10 @@ class DatabaseManager:
             conn.execute(
                 "CREATE INDEX IF NOT EXISTS idx_users_username ON users(username)"
             )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_users_location "
+                "ON users(location_lat, location_lon)"
+            )
             conn.execute(
                 "CREATE INDEX IF NOT EXISTS idx_user_sessions_user ON user_sessions(user_id)"
             )
@@ -206,31 +238,71 @@ class DatabaseManager:
 
             # Initialize metadata
             self._set_metadata(conn, "storage_version", "1.1")
-            self._set_metadata(conn, "created_at", datetime.utcnow().isoformat())
+            # Schema upgrades rerun this block; keep the original creation time
+            self._set_metadata(
+                conn, "created_at", datetime.utcnow().isoformat(), replace=False
+            )
 
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
             conn.commit()
-            logger.info(f"Database initialized at {self.db_path}")
+            logger.info("Database initialized at %s", self.db_path)
 
-    @contextmanager
-    def get_connection(self):
-        """Context manager for database connections"""
+    def _connect(self) -> sqlite3.Connection:
+        """Open a configured database connection"""
         conn = sqlite3.connect(self.db_path)
         conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA synchronous = NORMAL")
         conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def get_connection(self):
+        """Context manager for database connections (reused per thread)
+
+        Reuse only pays off on long-lived threads (gunicorn's gthread pool,
+        the activity writer). Servers that start a thread per request should
+        call close_thread_connection() when each request ends.
+        """
+        local = self._local
+        pooled = not getattr(local, "in_use", False)
+        if pooled:
+            conn = getattr(local, "conn", None)
+            if conn is None:
+                conn = local.conn = self._connect()
+            local.in_use = True
+        else:
+            # Nested use gets its own connection so transactions stay separate
+            conn = self._connect()
+
         try:
             yield conn
         except Exception as e:
             conn.rollback()
-            logger.error(f"Database error: {e}")
+            logger.error("Database error: %s", e)
             raise
         finally:
+            if pooled:
+                # Like close(), discard anything the caller did not commit
+                if conn.in_transaction:
+                    conn.rollback()
+                local.in_use = False
+            else:
+                conn.close()
+
+    def close_thread_connection(self):
+        """Close the calling thread's pooled connection, if it has an idle one"""
+        local = self._local
+        conn = getattr(local, "conn", None)
+        if conn is not None and not getattr(local, "in_use", False):
+            local.conn = None
             conn.close()
 
-    def _set_metadata(self, conn, key: str, value: str):
-        """Set metadata value"""
+    def _set_metadata(self, conn, key: str, value: str, replace: bool = True):
+        """Set metadata value (replace=False keeps an existing value)"""
         conn.execute(
-            """
-            INSERT OR REPLACE INTO db_metadata (key, value, updated_at)
+            f"""
+            INSERT OR {'REPLACE' if replace else 'IGNORE'}
+            INTO db_metadata (key, value, updated_at)
             VALUES (?, ?, CURRENT_TIMESTAMP)
         """,
             (key, value),
@@ -270,13 +342,13 @@ class DatabaseManager:
                     ),
                 )
                 conn.commit()
-                logger.info(f"Created user: {email}")
+                logger.info("Created user: %s", email)
                 return True
         except sqlite3.IntegrityError as e:
-            logger.error(f"User creation failed - duplicate: {e}")
+            logger.error("User creation failed - duplicate: %s", e)
             return False
         except Exception as e:
-            logger.error(f"User creation failed: {e}")
+            logger.error("User creation failed: %s", e)
             return False
 
     def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
@@ -315,7 +387,25 @@ class DatabaseManager:
                 conn.commit()
                 return True
         except Exception as e:
-            logger.error(f"Failed to update user login: {e}")
+            logger.error("Failed to update user login: %s", e)
+            return False
+
+    def update_user_password(self, user_id: str, password_hash: str) -> bool:
+        """Replace a user's password hash"""
+        try:
+            with self.get_connection() as conn:
+                conn.execute(
+                    """
+                    UPDATE users
+                    SET password_hash = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                    """,
+                    (password_hash, user_id),
+                )
+                conn.commit()
+                return True
+        except Exception as e:
+            logger.error("Failed to update user password: %s", e)
             return False
 
     def update_user_profile(self, user_id: str, updates: Dict[str, Any]) -> bool:
@@ -343,7 +433,7 @@ class DatabaseManager:
                 conn.commit()
                 return True
         except Exception as e:
-            logger.error(f"Failed to update user profile: {e}")
+            logger.error("Failed to update user profile: %s", e)
             return False
 
     def update_user_stats(self, user_id: str, study_minutes: int = 0) -> bool:
@@ -363,7 +453,7 @@ class DatabaseManager:
                 conn.commit()
                 return True
         except Exception as e:
-            logger.error(f"Failed to update user stats: {e}")
+            logger.error("Failed to update user stats: %s", e)
             return False
 
     def save_user_session(
@@ -388,7 +478,7 @@ class DatabaseManager:
                 conn.commit()
                 return True
         except Exception as e:
-            logger.error(f"Failed to save user session: {e}")
+            logger.error("Failed to save user session: %s", e)
             return False
 
     def get_user_by_token(self, token: str) -> Optional[Dict[str, Any]]:
@@ -425,7 +515,7 @@ class DatabaseManager:
                 conn.commit()
                 return True
         except Exception as e:
-            logger.error(f"Failed to invalidate session: {e}")
+            logger.error("Failed to invalidate session: %s", e)
             return False
 
     def find_users_nearby(
@@ -436,35 +526,72 @@ class DatabaseManager:
         exclude_user_id: str = None,
         limit: int = 20,
     ) -> List[Dict[str, Any]]:
-        """Find users within radius using Haversine formula"""
+        """Find users within radius: indexed bounding-box query, then Haversine"""
         try:
-            with self.get_connection() as conn:
-                # Haversine formula approximation
-                query = """
-                SELECT id, username, full_name, bio, avatar_url, 
+            # Only rows inside the radius's bounding box are read (using
+            # idx_users_location); exact distances are computed on those
+            lat_delta = radius_km / KM_PER_DEGREE
+            south, north = lat - lat_delta, lat + lat_delta
+            if south <= -90 or north >= 90:
+                # The circle contains a pole, so it spans every longitude
+                lon_delta = 360
+            else:
+                # Meridians converge towards the pole, so size the longitude
+                # span at the box's pole-ward edge, where it is widest
+                edge_lat = max(abs(south), abs(north))
+                lon_delta = radius_km / (
+                    KM_PER_DEGREE * math.cos(math.radians(edge_lat))
+                )
+
+            query = """
+                SELECT id, username, full_name, bio, avatar_url,
                        location_city, location_country,
                        study_streak, total_study_minutes,
-                       (6371 * acos(cos(radians(?)) * cos(radians(location_lat)) * 
-                        cos(radians(location_lon) - radians(?)) + 
-                        sin(radians(?)) * sin(radians(location_lat)))) AS distance
+                       location_lat, location_lon
                 FROM users
-                WHERE location_lat IS NOT NULL 
+                WHERE location_lat BETWEEN ? AND ?
                 AND location_lon IS NOT NULL
                 AND is_active = TRUE
-                """
-                params = [lat, lon, lat]
-
-                if exclude_user_id:
-                    query += " AND id != ?"
-                    params.append(exclude_user_id)
+            """
+            params = [south, north]
+
+            if lon_delta < 180:
+                west, east = lon - lon_delta, lon + lon_delta
+                if west < -180 or east > 180:
+                    # Box crosses the antimeridian: match both wrapped ends
+                    query += " AND (location_lon >= ? OR location_lon <= ?)"
+                    params.extend([(west + 540) % 360 - 180, (east + 540) % 360 - 180])
+                else:
+                    query += " AND location_lon BETWEEN ? AND ?"
+                    params.extend([west, east])
+
+            if exclude_user_id:
+                query += " AND id != ?"
+                params.append(exclude_user_id)
 
-                query += " HAVING distance <= ? ORDER BY distance LIMIT ?"
-                params.extend([radius_km, limit])
+            with self.get_connection() as conn:
+                rows = conn.execute(query, params).fetchall()
+
+            # Compare Haversine terms against the radius's own term, so asin
+            # and sqrt only run (and dicts are only built) for kept rows
+            max_term = math.sin(min(math.pi / 2, radius_km / (2 * EARTH_RADIUS_KM)))
+            max_term *= max_term
+            nearby = []
+            for row in rows:
+                term = haversine_term(
+                    lat, lon, row["location_lat"], row["location_lon"]
+                )
+                if term > max_term:
+                    continue
+                user = dict(row)
+                del user["location_lat"], user["location_lon"]
+                user["distance"] = haversine_term_to_km(term)
+                nearby.append(user)
 
-                cursor = conn.execute(query, params)
-                return [dict(row) for row in cursor.fetchall()]
+            nearby.sort(key=lambda user: user["distance"])
+            return nearby[:limit]
         except Exception as e:
-            logger.error(f"Failed to find nearby users: {e}")
+            logger.error("Failed to find nearby users: %s", e)
             return []
 
     def create_session(
@@ -510,7 +637,7 @@ class DatabaseManager:
             )
 
             conn.commit()
-            logger.info(f"Created session {session_id}: {topic}")
+            logger.info("Created session %s: %s", session_id, topic)
             return session_id
 
     def update_session(self, session_id: str, data: Dict[str, Any]) -> bool:
@@ -550,11 +677,11 @@ class DatabaseManager:
                 )
 
                 conn.commit()
-                logger.debug(f"Updated session {session_id}")
+                logger.debug("Updated session %s", session_id)
                 return True
 
         except Exception as e:
-            logger.error(f"Error updating session: {e}")
+            logger.error("Error updating session: %s", e)
             return False
 
     def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
@@ -606,21 +733,7 @@ class DatabaseManager:
     ) -> List[Dict[str, Any]]:
         """Get sessions with pagination and filtering"""
         with self.get_connection() as conn:
-            query = "SELECT * FROM study_sessions WHERE success = TRUE"
-            params = []
-
-            if date_from:
-                query += " AND date(start_time) >= ?"
-                params.append(date_from)
-
-            if date_to:
-                query += " AND date(start_time) <= ?"
-                params.append(date_to)
-
-            query += " ORDER BY start_time DESC LIMIT ? OFFSET ?"
-            params.extend([limit, offset])
-
-            cursor = conn.execute(query, params)
+            cursor = self._query_sessions(conn, "*", limit, offset, date_from, date_to)
             sessions = []
 
             for row in cursor.fetchall():
@@ -633,6 +746,47 @@ class DatabaseManager:
 
             return sessions
 
+    def get_session_rows(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        date_from: str = None,
+        date_to: str = None,
+    ) -> List[tuple]:
+        """Get session history rows as tuples in SESSION_ROW_COLUMNS order"""
+        with self.get_connection() as conn:
+            cursor = self._query_sessions(
+                conn, SESSION_ROW_COLUMNS, limit, offset, date_from, date_to
+            )
+            cursor.row_factory = None
+            return cursor.fetchall()
+
+    def _query_sessions(
+        self,
+        conn,
+        columns: str,
+        limit: int,
+        offset: int,
+        date_from: Optional[str],
+        date_to: Optional[str],
+    ):
+        """Run a paginated, date-filtered query over successful sessions"""
+        query = f"SELECT {columns} FROM study_sessions WHERE success = TRUE"
+        params = []
+
+        if date_from:
+            query += " AND date(start_time) >= ?"
+            params.append(date_from)
+
+        if date_to:
+            query += " AND date(start_time) <= ?"
+            params.append(date_to)
+
+        query += " ORDER BY start_time DESC LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+
+        return conn.execute(query, params)
+
     def log_activity_event(
         self,
         session_id: str,
@@ -659,6 +813,42 @@ class DatabaseManager:
 
             conn.commit()
 
+    def log_activity_events_batch(
+        self, events: List[Tuple[str, str, float, float, Dict[str, Any]]]
+    ) -> int:
+        """Log multiple activity events in a single transaction
+
+        Each event is a (session_id, event_type, timestamp, intensity, details)
+        tuple where timestamp is a Unix epoch in seconds.
+        """
+        if not events:
+            return 0
+
+        rows = [
+            (
+                session_id,
+                event_type,
+                datetime.utcfromtimestamp(timestamp).isoformat(),
+                intensity,
+                json.dumps(details or {}),
+            )
+            for session_id, event_type, timestamp, intensity, details in events
+        ]
+
+        with self.get_connection() as conn:
+            conn.executemany(
+                """
+                INSERT INTO activity_events 
+                (session_id, event_type, timestamp, intensity, details)
+                VALUES (?, ?, ?, ?, ?)
+            """,
+                rows,
+            )
+
+            conn.commit()
+
+        return len(rows)
+
     def get_session_events(self, session_id: str) -> List[Dict[str, Any]]:
         """Get activity events for a session"""
         with self.get_connection() as conn:
@@ -783,11 +973,13 @@ class DatabaseManager:
 
     def export_sessions_csv(self) -> str:
         """Export sessions as CSV"""
+        return "".join(self.iter_sessions_csv())
+
+    def iter_sessions_csv(self, batch_size: int = 500) -> Iterator[str]:
+        """Yield the sessions CSV export in chunks of batch_size rows"""
         import io
         import csv
 
-        sessions = self.get_sessions(limit=10000)  # Large limit for export
-
         output = io.StringIO()
         writer = csv.writer(output)
 
@@ -808,112 +1000,168 @@ class DatabaseManager:
             ]
         )
 
-        # Data rows
-        for session in sessions:
-            writer.writerow(
-                [
-                    session["id"],
-                    session["topic"],
-                    session.get("description", ""),
-                    session["start_time"],
-                    session.get("end_time", ""),
-                    (session["active_seconds"] or 0) // 60,
-                    (session["idle_seconds"] or 0) // 60,
-                    (session["total_seconds"] or 0) // 60,
-                    f"{session.get('productivity', 0):.1f}%",
-                    session.get("success", True),
-                    session["created_at"],
-                ]
-            )
-
-        return output.getvalue()
+        with self.get_connection() as conn:
+            cursor = conn.execute("""
+                SELECT id, topic, description, start_time, end_time, active_seconds,
+                       idle_seconds, total_seconds, productivity, success, created_at
+                FROM study_sessions
+                WHERE success = TRUE
+                ORDER BY start_time DESC
+                LIMIT 10000
+                """)
+            yield output.getvalue()
+
+            # Data rows, rendered a batch at a time into the reused buffer
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+
+                output.seek(0)
+                output.truncate()
+                writer.writerows(
+                    [
+                        row["id"],
+                        row["topic"],
+                        row["description"],
+                        row["start_time"],
+                        row["end_time"],
+                        (row["active_seconds"] or 0) // 60,
+                        (row["idle_seconds"] or 0) // 60,
+                        (row["total_seconds"] or 0) // 60,
+                        f"{row['productivity']:.1f}%",
+                        row["success"],
+                        row["created_at"],
+                    ]
+                    for row in rows
+                )
+                yield output.getvalue()
 
-    def import_sessions_csv(self, csv_content: str) -> Tuple[int, List[str]]:
-        """Import sessions from CSV content"""
+    def import_sessions_csv(
+        self, csv_content: Union[str, Iterable[str]], batch_size: int = 1000
+    ) -> Tuple[int, List[str]]:
+        """Import sessions from CSV content or an iterable of CSV lines"""
         import io
         import csv
         import uuid
+        from itertools import chain
 
-        sessions = []
         errors = []
+        imported_count = 0
+        batch = []
+        decode_error = None
+        insert_sql = """
+            INSERT INTO study_sessions
+            (id, topic, description, start_time, end_time, active_seconds,
+             idle_seconds, total_seconds, productivity, success, metadata)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """
 
         try:
-            csv_reader = csv.reader(io.StringIO(csv_content))
-
-            # Skip header if present
-            header = next(csv_reader, None)
-            if header and "topic" in str(header).lower():
-                pass  # Skip header
-            else:
-                # Reset reader if no header
-                csv_reader = csv.reader(io.StringIO(csv_content))
-
-            row_count = 0
-            for row in csv_reader:
-                row_count += 1
-                if len(row) < 2:
-                    errors.append(f"Row {row_count}: Too few columns")
-                    continue
-
-                try:
-                    # Parse row (Topic, Start Time, Duration format)
-                    topic = row[0].strip()
-                    if not topic:
-                        errors.append(f"Row {row_count}: Empty topic")
-                        continue
-
-                    # Parse duration (assumed to be in column 2)
-                    duration_minutes = 0
-                    if len(row) > 2 and row[2]:
-                        try:
-                            duration_minutes = int(float(row[2]))
-                        except ValueError:
-                            duration_minutes = 0
-
-                    # Create session data
-                    session = {
-                        "id": str(uuid.uuid4()),
-                        "topic": topic,
-                        "description": row[1].strip() if len(row) > 1 else "",
-                        "start_time": datetime.utcnow().isoformat(),
-                        "end_time": datetime.utcnow().isoformat(),
-                        "active_seconds": duration_minutes * 60,
-                        "idle_seconds": 0,
-                        "total_seconds": duration_minutes * 60,
-                        "productivity": 100.0 if duration_minutes > 0 else 0.0,
-                        "success": True,
-                    }
-
-                    sessions.append(session)
-
-                except Exception as e:
-                    errors.append(f"Row {row_count}: {str(e)}")
-                    continue
+            if isinstance(csv_content, str):
+                csv_content = io.StringIO(csv_content)
+            csv_reader = csv.reader(csv_content)
 
-            # Import sessions to database
-            imported_count = 0
-            for session in sessions:
+            # Rows are inserted in batches as they are parsed, all inside one
+            # transaction, so memory stays bounded by batch_size
+            with self.get_connection() as conn:
                 try:
-                    if self.create_session(
-                        session["topic"], session.get("description", "")
-                    ):
-                        self.update_session(
-                            session["id"],
-                            {
-                                k: v
-                                for k, v in session.items()
-                                if k not in ["id", "topic", "description"]
-                            },
+                    # Skip header if present
+                    header = next(csv_reader, None)
+                    if header and "topic" in str(header).lower():
+                        pass  # Skip header
+                    elif header is not None:
+                        # No header: the first row is data
+                        csv_reader = chain((header,), csv_reader)
+
+                    row_count = 0
+                    for row in csv_reader:
+                        row_count += 1
+                        if len(row) < 2:
+                            errors.append(f"Row {row_count}: Too few columns")
+                            continue
+
+                        # Parse row (Topic, Description, Duration format)
+                        topic = row[0].strip()
+                        if not topic:
+                            errors.append(f"Row {row_count}: Empty topic")
+                            continue
+
+                        # Parse duration (assumed to be in column 2)
+                        duration_minutes = 0
+                        if len(row) > 2 and row[2]:
+                            try:
+                                duration_minutes = int(float(row[2]))
+                            except ValueError:
+                                duration_minutes = 0
+
+                        now = datetime.utcnow().isoformat()
+                        seconds = duration_minutes * 60
+                        batch.append(
+                            (
+                                str(uuid.uuid4()),
+                                topic,
+                                row[1].strip(),
+                                now,
+                                now,
+                                seconds,
+                                0,
+                                seconds,
+                                100.0 if duration_minutes > 0 else 0.0,
+                                True,
+                                "{}",
+                            )
                         )
-                        imported_count += 1
-                except Exception as e:
-                    errors.append(f"Error importing session: {str(e)}")
 
+                        if len(batch) >= batch_size:
+                            conn.executemany(insert_sql, batch)
+                            imported_count += len(batch)
+                            batch.clear()
+
+                    if batch:
+                        conn.executemany(insert_sql, batch)
+                        imported_count += len(batch)
+
+                    self._trim_sessions(conn)
+                    conn.commit()
+
+                except UnicodeDecodeError as e:
+                    # Expected when the caller guessed the wrong encoding: undo
+                    # the batches so far and re-raise outside get_connection,
+                    # which would otherwise log it as a database error
+                    conn.rollback()
+                    decode_error = e
+
+            if decode_error is not None:
+                raise decode_error
             return imported_count, errors
 
+        except UnicodeDecodeError:
+            # Let callers retry streamed input with another encoding
+            raise
         except Exception as e:
             return 0, [f"CSV parsing error: {str(e)}"]
 
+    def _trim_sessions(self, conn):
+        """Delete the oldest completed sessions beyond max_sessions"""
+        cursor = conn.execute(
+            "SELECT COUNT(*) FROM study_sessions WHERE success = TRUE"
+        )
+        excess = cursor.fetchone()[0] - self.max_sessions
+        if excess > 0:
+            conn.execute(
+                """
+                DELETE FROM study_sessions
+                WHERE id IN (
+                    SELECT id FROM study_sessions
+                    WHERE success = TRUE
+                    ORDER BY start_time ASC
+                    LIMIT ?
+                )
+            """,
+                (excess,),
+            )
+
     def health_check(self) -> Dict[str, Any]:
         """Perform database health check"""
         try:
@@ -958,7 +1206,7 @@ class DatabaseManager:
             deleted_count = cursor.rowcount
             conn.commit()
 
-            logger.info(f"Cleaned up {deleted_count} old activity events")
+            logger.info("Cleaned up %s old activity events", deleted_count)
             return deleted_count
 
     # ==================== STUDY MATERIALS ====================
@@ -999,7 +1247,7 @@ class DatabaseManager:
                 conn.commit()
                 return True
         except Exception as e:
-            logger.error(f"Error saving material: {e}")
+            logger.error("Error saving material: %s", e)
             return False
 
     def get_material_by_id(self, material_id: str) -> Optional[Dict[str, Any]]:
@@ -1076,7 +1324,7 @@ class DatabaseManager:
                 conn.commit()
                 return True
         except Exception as e:
-            logger.error(f"Error deleting material: {e}")
+            logger.error("Error deleting material: %s", e)
             return False
 
     def increment_download_count(self, material_id: str) -> bool:
@@ -1090,7 +1338,7 @@ class DatabaseManager:
                 conn.commit()
                 return True
         except Exception as e:
-            logger.error(f"Error incrementing download count: {e}")
+            logger.error("Error incrementing download count: %s", e)
             return False
 
     def create_rating(
@@ -1118,7 +1366,7 @@ class DatabaseManager:
                 conn.commit()
                 return True
         except Exception as e:
-            logger.error(f"Error creating rating: {e}")
+            logger.error("Error creating rating: %s", e)
             return False
 
     def update_rating(self, rating_id: int, rating: int, comment: str) -> bool:
@@ -1132,7 +1380,7 @@ class DatabaseManager:
                 conn.commit()
                 return True
         except Exception as e:
-            logger.error(f"Error updating rating: {e}")
+            logger.error("Error updating rating: %s", e)
             return False
 
     def get_user_rating(
@@ -1231,7 +1479,7 @@ class DatabaseManager:
                 conn.commit()
                 return True
         except Exception as e:
-            logger.error(f"Error creating buddy request: {e}")
+            logger.error("Error creating buddy request: %s", e)
             return False
 
     def update_study_buddy_status(
@@ -1251,7 +1499,7 @@ class DatabaseManager:
                 conn.commit()
                 return True
         except Exception as e:
-            logger.error(f"Error updating buddy status: {e}")
+            logger.error("Error updating buddy status: %s", e)
             return False
 
     def get_pending_buddy_requests(self, user_id: str) -> List[Dict[str, Any]]:
@@ -1311,7 +1559,7 @@ class DatabaseManager:
                 conn.commit()
                 return True
         except Exception as e:
-            logger.error(f"Error deleting buddy relationship: {e}")
+            logger.error("Error deleting buddy relationship: %s", e)
             return False
 
     def block_study_buddy(self, user_id: str, blocked_id: str) -> bool:
@@ -1330,7 +1578,7 @@ class DatabaseManager:
                 conn.commit()
                 return True
         except Exception as e:
-            logger.error(f"Error blocking user: {e}")
+            logger.error("Error blocking user: %s", e)
             return False
 
 
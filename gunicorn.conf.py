@@ -0,0 +1,22 @@
+"""
+Gunicorn settings for Study Tracker (picked up automatically from this directory)
+Run with: gunicorn wsgi:application
+"""
+
+import os
+
+bind = os.getenv("GUNICORN_BIND", "127.0.0.1:5000")
+
+# Sessions, activity monitoring and caches live in-process, so a second worker
+# would see different state; scale with threads instead. Password hashing
+# releases the GIL, so the threads still use multiple cores for logins.
+workers = 1
+worker_class = "gthread"
+# Thread budget: every open /status_stream holds one of these threads, so keep
+# STATUS_STREAM_MAX (default 2) well below this; the rest serve API requests.
+# Streams also close after STATUS_STREAM_MAX_AGE seconds and reconnect.
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+
+# Importing the app opens SQLite connections, which must not be inherited
+# across a fork, so load it in the worker rather than the master
+preload_app = False
@@ -20,17 +20,19 @@ logger = logging.getLogger(__name__)
 # File upload configuration
 UPLOAD_FOLDER = Path(__file__).parent / "uploads"
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
-ALLOWED_EXTENSIONS = {
-    ".pdf",
-    ".doc",
-    ".docx",
-    ".txt",
-    ".md",
-    ".ppt",
-    ".pptx",
-    ".xls",
-    ".xlsx",
-}
+ALLOWED_EXTENSIONS = frozenset(
+    {
+        ".pdf",
+        ".doc",
+        ".docx",
+        ".txt",
+        ".md",
+        ".ppt",
+        ".pptx",
+        ".xls",
+        ".xlsx",
+    }
+)
 
 
 def ensure_upload_folder():
@@ -179,31 +181,26 @@ class MaterialManager:
         limit: int = 50,
         offset: int = 0,
     ) -> List[Dict[str, Any]]:
-        """Search for study materials"""
-        try:
-            materials = self.db_manager.search_materials(
-                query=query,
-                subject=subject,
-                tags=tags,
-                user_id=user_id if not only_public else None,
-                only_public=only_public,
-                limit=limit,
-                offset=offset,
+        """Search for study materials (database errors are raised, not hidden)"""
+        materials = self.db_manager.search_materials(
+            query=query,
+            subject=subject,
+            tags=tags,
+            user_id=user_id if not only_public else None,
+            only_public=only_public,
+            limit=limit,
+            offset=offset,
+        )
+
+        # Enrich with additional info
+        for material in materials:
+            material["file_size_formatted"] = self._format_file_size(
+                material["file_size"]
             )
+            material["average_rating"] = self._calculate_average_rating(material)
+            material["uploader_name"] = self._get_uploader_name(material["user_id"])
 
-            # Enrich with additional info
-            for material in materials:
-                material["file_size_formatted"] = self._format_file_size(
-                    material["file_size"]
-                )
-                material["average_rating"] = self._calculate_average_rating(material)
-                material["uploader_name"] = self._get_uploader_name(material["user_id"])
-
-            return materials
-
-        except Exception as e:
-            logger.error(f"Error searching materials: {e}")
-            return []
+        return materials
 
     def get_user_materials(
         self, user_id: str, limit: int = 50, offset: int = 0
@@ -273,12 +270,8 @@ class MaterialManager:
             return []
 
     def get_popular_tags(self, limit: int = 20) -> List[Dict[str, Any]]:
-        """Get most popular subject tags"""
-        try:
-            return self.db_manager.get_popular_tags(limit)
-        except Exception as e:
-            logger.error(f"Error getting popular tags: {e}")
-            return []
+        """Get most popular subject tags (database errors are raised, not hidden)"""
+        return self.db_manager.get_popular_tags(limit)
 
     def _format_file_size(self, size_bytes: int) -> str:
         """Format file size in human-readable format"""
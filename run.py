@@ -8,6 +8,7 @@ import os
 import sys
 import logging
 from app import app, db_manager, activity_monitor
+from utils import configure_logging
 
 
 def setup_production_logging():
@@ -15,10 +16,11 @@ def setup_production_logging():
     log_dir = os.path.expanduser("~/study_tracker_logs")
     os.makedirs(log_dir, exist_ok=True)
 
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
+    # Replaces the stderr handler app.py installed at import; basicConfig()
+    # would have been a no-op here since the root logger already had one
+    configure_logging(
+        logging.INFO,
+        [
             logging.FileHandler(os.path.join(log_dir, "study_tracker.log")),
             logging.StreamHandler(sys.stdout),
         ],
@@ -88,7 +88,7 @@ class SessionManager:
                     {"topic": topic, "description": description},
                 )
 
-                logger.info(f"Started session {session_id}: {topic}")
+                logger.info("Started session %s: %s", session_id, topic)
                 self._notify_observers(
                     "session_started", {"session_id": session_id, "topic": topic}
                 )
@@ -96,7 +96,7 @@ class SessionManager:
                 return session_id
 
             except Exception as e:
-                logger.error(f"Failed to start session: {e}")
+                logger.error("Failed to start session: %s", e)
                 self._cleanup_session()
                 raise
 
@@ -118,7 +118,7 @@ class SessionManager:
                 self.current_session["id"], "session_paused", 0.0, {"reason": reason}
             )
 
-            logger.info(f"Paused session {self.current_session['id']}: {reason}")
+            logger.info("Paused session %s: %s", self.current_session["id"], reason)
 
             # Return current stats
             return self._get_session_stats()
@@ -148,7 +148,7 @@ class SessionManager:
                 self.current_session["id"], "session_resumed", 1.0, {}
             )
 
-            logger.info(f"Resumed session {self.current_session['id']}")
+            logger.info("Resumed session %s", self.current_session["id"])
 
             # Return current stats
             return self._get_session_stats()
@@ -214,7 +214,9 @@ class SessionManager:
                 }
 
                 logger.info(
-                    f"Completed session {self.current_session['id']}: {session_summary}"
+                    "Completed session %s: %s",
+                    self.current_session["id"],
+                    session_summary,
                 )
                 self._notify_observers("session_completed", session_summary)
 
@@ -224,7 +226,7 @@ class SessionManager:
                 return session_summary
 
             except Exception as e:
-                logger.error(f"Failed to stop session: {e}")
+                logger.error("Failed to stop session: %s", e)
                 self._cleanup_session()
                 raise
 
@@ -290,6 +292,14 @@ class SessionManager:
                     activity_data.get("details", {}),
                 )
 
+    def touch_last_activity(self, timestamp: float) -> None:
+        """Record the time of the latest input event for the active session"""
+        with self.state_lock:
+            if not self.current_session or self.session_state != SessionState.ACTIVE:
+                return
+
+            self.last_activity_time = timestamp
+
     def update_session_idle_state(self, is_idle: bool, timestamp: float) -> None:
         """Update session idle state"""
         with self.state_lock:
@@ -439,7 +449,7 @@ class SessionManager:
             try:
                 observer(event_type, data)
             except Exception as e:
-                logger.error(f"Error notifying observer: {e}")
+                logger.error("Error notifying observer: %s", e)
 
     def _cleanup_session(self):
         """Clean up current session state"""
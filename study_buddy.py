@@ -5,7 +5,6 @@ Helps users find nearby study partners based on location and study compatibility
 """
 
 import logging
-import math
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 from database import DatabaseManager
@@ -411,31 +410,6 @@ class StudyBuddySystem:
             return False
 
 
-# Haversine formula for distance calculation
-def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """
-    Calculate the great circle distance between two points
-    on the earth (specified in decimal degrees)
-    Returns distance in kilometers
-    """
-    # Convert decimal degrees to radians
-    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-
-    # Haversine formula
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = (
-        math.sin(dlat / 2) ** 2
-        + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
-    )
-    c = 2 * math.asin(math.sqrt(a))
-
-    # Radius of earth in kilometers
-    r = 6371
-
-    return c * r
-
-
 # Helper function
 def get_study_buddy_system():
     """Get study buddy system instance"""
@@ -1,14 +1,23 @@
+import math
 import time
 import re
 import html
 import csv
 import io
+import queue
+import atexit
 import logging
+import logging.handlers
+import threading
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Callable, Hashable, Optional
 
 logger = logging.getLogger(__name__)
 
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+_log_listener = None  # QueueListener started by configure_logging()
+
 
 def format_duration(seconds: int) -> str:
     """Format seconds into human-readable duration"""
@@ -37,6 +46,20 @@ def format_productivity(productivity: float) -> str:
         return f"{productivity:.1f}% (Very Poor)"
 
 
+_iso_now_cache = (0, "")  # (unix second, formatted timestamp)
+
+
+def iso_now() -> str:
+    """Current UTC time as an ISO 8601 string, reformatted once per second"""
+    global _iso_now_cache
+    now = int(time.time())
+    cached_second, formatted = _iso_now_cache
+    if now != cached_second:
+        formatted = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now))
+        _iso_now_cache = (now, formatted)
+    return formatted
+
+
 def format_datetime(dt_string: str, format_type: str = "date") -> str:
     """Format datetime string for display"""
     if not dt_string:
@@ -68,7 +91,7 @@ def format_datetime(dt_string: str, format_type: str = "date") -> str:
         else:
             return dt_string
     except Exception as e:
-        logger.warning(f"Error formatting datetime: {e}")
+        logger.warning("Error formatting datetime: %s", e)
         return dt_string
 
 
@@ -142,7 +165,7 @@ def calculate_time_periods(start_time: str, end_time: str = None) -> Dict[str, i
         }
 
     except Exception as e:
-        logger.error(f"Error calculating time periods: {e}")
+        logger.error("Error calculating time periods: %s", e)
         return {"total_seconds": 0, "minutes": 0, "hours": 0, "days": 0}
 
 
@@ -264,6 +287,30 @@ def clamp(value: float, min_val: float, max_val: float) -> float:
     return max(min_val, min(max_val, value))
 
 
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_term(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """The Haversine "a" term; grows monotonically with distance"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    half_dphi = (phi2 - phi1) / 2
+    half_dlambda = math.radians(lon2 - lon1) / 2
+    return (
+        math.sin(half_dphi) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(half_dlambda) ** 2
+    )
+
+
+def haversine_term_to_km(term: float) -> float:
+    """Convert a Haversine "a" term into a distance in kilometres"""
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, term)))
+
+
+def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great circle distance in kilometres between two points in decimal degrees"""
+    return haversine_term_to_km(haversine_term(lat1, lon1, lat2, lon2))
+
+
 def is_valid_email(email: str) -> bool:
     """Basic email validation"""
     pattern = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
@@ -337,3 +384,104 @@ def create_summary_stats(numbers: List[float]) -> Dict[str, float]:
         "max": round(max(sorted_numbers), 2),
         "std": round(std, 2),
     }
+
+
+def configure_logging(level: int, handlers: Optional[List[logging.Handler]] = None):
+    """Log through a queue so request threads never wait on handler I/O"""
+    global _log_listener
+    if handlers is None:
+        handlers = [logging.StreamHandler()]
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    if _log_listener is None:
+        atexit.register(_stop_log_listener)
+    else:
+        # Reconfiguring (e.g. run.py after app import): drain the old listener
+        _log_listener.stop()
+
+    log_queue = queue.Queue(-1)
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(level)
+
+    _log_listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    _log_listener.start()
+
+
+def _stop_log_listener():
+    """Flush queued records to their handlers at interpreter exit"""
+    if _log_listener is not None:
+        _log_listener.stop()
+
+
+class TTLCache:
+    """Small thread-safe cache whose entries expire after ttl seconds"""
+
+    def __init__(self, ttl: float = 30.0, maxsize: int = 256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: Dict[Hashable, tuple] = {}  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._generation = 0  # bumped by clear() to discard in-flight results
+
+    def get_or_compute(
+        self, key: Hashable, compute: Callable[[], Any], cache_none: bool = True
+    ) -> Any:
+        """Return the cached value for key, calling compute() on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+            generation = self._generation
+
+        # Compute outside the lock so slow queries don't serialize requests
+        value = compute()
+
+        if value is None and not cache_none:
+            return value
+
+        with self._lock:
+            if generation != self._generation:
+                return value
+            if len(self._entries) >= self.maxsize:
+                self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+                if len(self._entries) >= self.maxsize:
+                    self._entries.clear()
+            self._entries[key] = (now + self.ttl, value)
+        return value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        return default
+
+    def set(self, key: Hashable, value: Any):
+        """Store value under key for ttl seconds"""
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= self.maxsize:
+                self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+                if len(self._entries) >= self.maxsize:
+                    self._entries.clear()
+            self._entries[key] = (now + self.ttl, value)
+
+    def delete(self, key: Hashable):
+        """Drop one entry, discarding any result still being computed"""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generation += 1
+
+    def clear(self):
+        """Drop all cached entries"""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
@@ -0,0 +1,19 @@
+"""
+WSGI entry point for Study Tracker
+Run with: gunicorn wsgi:application (settings in gunicorn.conf.py)
+
+Session and activity state live in this process, so scale with threads
+rather than extra worker processes.
+"""
+
+import atexit
+
+from app import app, activity_monitor
+
+# Flush queued activity events when the worker exits
+atexit.register(activity_monitor.stop_monitoring)
+
+# gthread workers serve many requests per thread, so keep their connections
+app.config["REUSE_DB_CONNECTIONS"] = True
+
+application = app